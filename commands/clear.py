@@ -13,6 +13,20 @@
 # Imports                                                                          #
 ####################################################################################
 import os 
+import sys
+
+
+####################################################################################
+# Global Variables                                                                 #
+####################################################################################
+
+# Legacy windows consoles don't support ANSI escape codes
+LEGACY_CONSOLE = ( os.name in ('nt', 'dos') and 
+                   not os.environ.get( 'WT_SESSION' ) and 
+                   not os.environ.get( 'ANSICON' ) )
+
+# Erase the screen and move the cursor home
+CLEAR_SEQUENCE = "\x1b[2J\x1b[H"
 
 
 ####################################################################################
@@ -30,10 +44,11 @@ import os
 #                                                                                  #
 ####################################################################################
 def clearConsole( Args, zavDevice ):
-    command = 'clear'
-    if os.name in ('nt', 'dos'):
-        command = 'cls'
-    os.system(command)
+    if ( LEGACY_CONSOLE ):
+        os.system( 'cls' )
+    else:
+        sys.stdout.write( CLEAR_SEQUENCE )
+        sys.stdout.flush()
     return 
 ## clearConsole ##
 
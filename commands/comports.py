@@ -15,7 +15,7 @@
 ####################################################################################
 
 # Standard
-import serial.tools.list_ports
+import sys
 
 # Project
 import config
@@ -27,12 +27,6 @@ import validator
 # Globals                                                                          #
 ####################################################################################
 
-# Serial port timeouts
-if ( config.zav_debug ):
-	default_timeout = 100 # 100 second timeout
-else:
-	default_timeout = 1   # 1 second timeout
-
 # Options Dictionary
 INPUTS = { 
         '-h' : 'Display help info',
@@ -47,6 +41,10 @@ MAX_ARGS = 3
 # Command type -- subcommand function
 COMMAND_TYPE = 'default'
 
+# Error messages
+INVALID_BAUDRATE_MSG = ( "Error: invalid baudrate. Check that the baudrate is in "
+                         "bits/s and is an integer" )
+
 
 ####################################################################################
 # Procedures                                                                       #
@@ -55,131 +53,161 @@ COMMAND_TYPE = 'default'
 
 ####################################################################################
 #                                                                                  #
-# COMMAND:                                                                         #
-# 		comports                                                                   #
+# PROCEDURE:                                                                       #
+# 		print_port_list                                                            #
 #                                                                                  #
 # DESCRIPTION:                                                                     #
-# 		connects to a USB device or displays connectivity                          #
+# 		displays a listing of serial ports                                         #
 #                                                                                  #
 ####################################################################################
-def comports( Args, zavDevice ):
+def print_port_list( avail_ports ):
+
+	# Build the listing and write it all at once
+	port_list = [ "\nAvailable COM ports: \n" ]
+	for port_num,port in enumerate( avail_ports ):
+		port_list.append( f"\t{port_num}: {port.device} - " ) 
+		if ( port.manufacturer != None ):
+			port_list.append( f"{port.manufacturer}: " )
+		if ( port.description  != None ):
+			port_list.append( f"{port.product}\n" )
+		else:
+			port_list.append( "device info unavailable\n" )
+	port_list.append( "\n" )
+	sys.stdout.write( "".join( port_list ) )
+## print_port_list ##
 
 
-	##############################################################################
-	# Basic inputs parsing                                                       #
-	##############################################################################
-	parse_check = validator.parseArgs(
-                            Args,
-                            MAX_ARGS,
-                            INPUTS,
-                            COMMAND_TYPE 
-                           )
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		comports_list                                                              #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		displays the available serial ports (-l)                                   #
+#                                                                                  #
+####################################################################################
+def comports_list( zavDevice, target_port, baudrate ):
+	print_port_list( zavDevice.list_ports_cached() )
+## comports_list ##
 
-	if ( not parse_check ):
-		return # user inputs failed parse tests
 
-	##############################################################################
-	# Command Specific Parsing                                                   #
-	##############################################################################
-	option            = Args[0]
-	port_supplied     = False
-	baudrate_supplied = False
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		comports_help                                                              #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		displays the comports help info (-h)                                       #
+#                                                                                  #
+####################################################################################
+def comports_help( zavDevice, target_port, baudrate ):
+	messageUtil.display_help_info( 'comports' )
+## comports_help ##
 
-	# Set variables if they exist 
-	if ( len(Args) >= 2 ):
-		target_port   = Args[1]
-		port_supplied = True
 
-	# Check for valid baudrate
-	if ( len(Args) == 3 ):
-		try: 
-			baudrate = int( Args[2] )
-			baudrate_supplied = True
-		except ValueError:
-			print( "Error: invalid baudrate. Check that the " +
-                  "baudrate is in bits/s and is an integer" )
-			return 
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		comports_connect                                                           #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		connects to a serial port (-c)                                             #
+#                                                                                  #
+####################################################################################
+def comports_connect( zavDevice, target_port, baudrate ):
+	# Check that port has been supplied
+	if   ( target_port is None ):
+		print( "Error: no port supplied to comports function" )
+		return 
 
-	##############################################################################
-    # List Option (-l)                                                           #
-	##############################################################################
-	if ( option == "-l" ):
-
-		avail_ports = serial.tools.list_ports.comports()
-		print( "\nAvailable COM ports: " )
-		for port_num,port in enumerate( avail_ports ):
-			print( "\t" + str(port_num) + ": " + port.device + 
-                   " - ", end="" ) 
-			if ( port.manufacturer != None ):
-				print( port.manufacturer + ": ", end="" )
-			if ( port.description  != None ):
-				print( port.product )
-			else:
-				print( "device info unavailable" )
-		print()
+	# Check that baudrate has been supplied
+	elif ( baudrate is None ):
+		print( "Error: no baudrate supplied to comports function" )
 		return 
 
-	##############################################################################
-    # Help Option (-h)                                                           #
-	##############################################################################
-	elif ( option == "-h" ):
-		messageUtil.display_help_info( 'comports' )
+	# Check that inputed port is valid
+	avail_ports         = zavDevice.list_ports_cached()
+	avail_ports_devices = { port.device for port in avail_ports }
+	if ( not (target_port in avail_ports_devices) ):
+		print( "Error: Invalid serial port\n" )
+		print_port_list( avail_ports )
 		return 
 
-	##############################################################################
-    # Connect Option (-c)                                                        #
-	##############################################################################
-	elif ( option == "-c" ):
-		# Check that port has been supplied
-		if   ( not port_supplied     ):
-			print( "Error: no port supplied to comports " +
-                   "function" )
-			return 
+	# Initialize Serial Port
+	zavDevice.initComport(
+                         baudrate, 
+                         target_port, 
+                         config.DEFAULT_TIMEOUT
+                         )
 
-		# Check that baudrate has been supplied
-		elif ( not baudrate_supplied ):
-			print( "Error: no baudrate supplied to comports " +
-                   "function" )
-			return 
+	# Connect to serial port
+	connection_status = zavDevice.openComport()
+	if( connection_status ):
+		print( f"Connected to port {target_port} at {baudrate} baud" )
+## comports_connect ##
 
-		# Check that inputed port is valid
-		avail_ports = serial.tools.list_ports.comports()
-		avail_ports_devices = []
-		for port in avail_ports:
-			avail_ports_devices.append(port.device)
-		if ( not (target_port in avail_ports_devices) ):
-			print( "Error: Invalid serial port\n" )
-			comports( ["-l"] )
-			return 
 
-		# Initialize Serial Port
-		zavDevice.initComport(
-                             baudrate, 
-                             target_port, 
-                             default_timeout
-                             )
-
-		# Connect to serial port
-		connection_status = zavDevice.openComport()
-		if( connection_status ):
-			print( "Connected to port " + target_port + 
-                   " at " + str(baudrate) + " baud" )
-		return 
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		comports_disconnect                                                        #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		disconnects from the active serial port (-d)                               #
+#                                                                                  #
+####################################################################################
+def comports_disconnect( zavDevice, target_port, baudrate ):
+	connection_status = zavDevice.closeComport()
+	if ( connection_status ):
+		print( "Disconnected from active serial port" )
+	else: 
+		print( f"An error ocurred while closing port {zavDevice.comport}" )
+## comports_disconnect ##
+
+
+# Option handlers
+COMPORTS_OPS = {
+               '-l' : comports_list,
+               '-h' : comports_help,
+               '-c' : comports_connect,
+               '-d' : comports_disconnect
+}
+
+
+####################################################################################
+#                                                                                  #
+# COMMAND:                                                                         #
+# 		comports                                                                   #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		connects to a USB device or displays connectivity                          #
+#                                                                                  #
+####################################################################################
+@validator.validated( MAX_ARGS, INPUTS, COMMAND_TYPE )
+def comports( Args, zavDevice ):
 
 	##############################################################################
-    # Disconnect Option (-d)                                                     #
+	# Command Specific Parsing                                                   #
 	##############################################################################
-	elif ( option == "-d" ):
-		connection_status = zavDevice.closeComport()
-		if ( connection_status ):
-			print( "Disconnected from active serial port" )
-			return 
-		else: 
-			print( "An error ocurred while closing port " + 
-                   target_port )
+	option      = Args[0]
+	target_port = None
+	baudrate    = None
+
+	# Set variables if they exist 
+	if ( len(Args) >= 2 ):
+		target_port = Args[1]
+
+	# Check for valid baudrate
+	if ( len(Args) == 3 ):
+		if ( not Args[2].isdecimal() ):
+			print( INVALID_BAUDRATE_MSG )
 			return 
+		baudrate = int( Args[2] )
 
-	return 
+	##############################################################################
+	# Run the option                                                             #
+	##############################################################################
+	COMPORTS_OPS[option]( zavDevice, target_port, baudrate )
 ## comports ##
 
 
@@ -13,9 +13,12 @@
 # Imports                                                                          #
 ####################################################################################
 
+# Standard
+import struct
+import sys
+
 # Project
 import comports
-import config
 import messageUtil
 import validator
 import zavController
@@ -25,15 +28,12 @@ import zavController
 # Global Variables                                                                 #
 ####################################################################################
 
-# Serial port timeouts
-if ( config.zav_debug ):
-	default_timeout = 100 # 100 second timeout
-else:
-	default_timeout = 1   # 1 second timeout
-
 # Connect Command Opcode
 OPCODE = b'\x02'
 
+# Connect response frame: controller identification code, firmware id
+CONNECT_RESPONSE = struct.Struct( '<BB' )
+
 # Options Dictionary
 INPUTS = { 
         '-h' : 'Display help info',
@@ -47,12 +47,95 @@ MAX_ARGS = 2
 # Command type -- subcommand function
 COMMAND_TYPE = 'default'
 
+# Error messages
+PORT_ACTIVE_MSG = ( "Error: Serial port {} is active. Disconnect from the active " 
+                    "serial port before connecting" )
+
 
 ####################################################################################
 # Procedures                                                                       #
 ####################################################################################
 
 
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		connect_help                                                               #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		displays the connect help info (-h)                                        #
+#                                                                                  #
+####################################################################################
+def connect_help( zavDevice, user_port ):
+	messageUtil.display_help_info( "connect" )
+## connect_help ##
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		connect_port                                                               #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		opens the serial port and identifies the connected controller (-p)         #
+#                                                                                  #
+####################################################################################
+def connect_port( zavDevice, user_port ):
+	# Open the serial comport
+	comports.comports( ['-c', user_port, '921600'], zavDevice )
+	
+	# Send the connect opcode 
+	zavDevice.sendByte( OPCODE )
+
+	# Get the board identifier and firmware id in one read, a short read 
+	# or unknown board code fails the connection. readBytes returns None if 
+	# the port failed to open
+	response = zavDevice.readBytes( CONNECT_RESPONSE.size ) or b''
+	if ( len( response ) == CONNECT_RESPONSE.size ):
+		controller_response, firmware_response = CONNECT_RESPONSE.unpack( response )
+		controller_description = zavController.controller_descriptions.get( controller_response )
+	else:
+		controller_description = None
+	if ( controller_description is None ):
+		print( "Controller connection was unsuccessful." )
+		comports.comports_disconnect( zavDevice, user_port, None )
+		return 
+
+	# Look up the firmware version 
+	firmware_version = zavController.firmware_ids[firmware_response]
+
+	# Set global controller variable 
+	zavDevice.set_controller( controller_description, firmware_version )
+
+	# Display connection info									
+	print( f"Connection established with {controller_description}" )
+	print( f"Firmware: {firmware_version}" )
+## connect_port ##
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		connect_disconnect                                                         #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		closes the serial port and clears the controller (-d)                      #
+#                                                                                  #
+####################################################################################
+def connect_disconnect( zavDevice, user_port ):
+	comports.comports_disconnect( zavDevice, user_port, None )
+	zavDevice.reset_controller()
+## connect_disconnect ##
+
+
+# Option handlers
+CONNECT_OPS = {
+              '-h' : connect_help,
+              '-p' : connect_port,
+              '-d' : connect_disconnect
+}
+
+
 ####################################################################################
 #                                                                                  #
 # COMMAND:                                                                         #
@@ -62,116 +145,48 @@ COMMAND_TYPE = 'default'
 # 		establish a serial connection with an SDR board                            #
 #                                                                                  #
 ####################################################################################
+@validator.validated( MAX_ARGS, INPUTS, COMMAND_TYPE )
 def connect( Args, zavDevice ):
 
-	################################################################################
-	# Local Variables                                                              #
-	################################################################################
-
-	# Firmware version
-	firmware_version = None
-
-
-	################################################################################
-	# Basic inputs parsing                                                         #
-	################################################################################
-	parse_check = validator.parseArgs(
-                            Args,
-                            MAX_ARGS,
-                            INPUTS,
-                            COMMAND_TYPE 
-                           )
-	if ( not parse_check ):
-		return # user inputs failed parse tests
-	option = Args[0]
-	if ( len(Args) > 1 ):
-		user_port = Args[1]
+	option    = Args[0]
+	user_port = Args[1] if ( len(Args) > 1 ) else None
 
 	##############################################################################
 	# Command-Specific Inputs Parsing                                            #
 	##############################################################################
 
-	# Check if there is an active serial port
-	if ( zavDevice.is_active() and option == '-p' ):
-		print("Error: Serial port " + zavDevice.comport + 
-               "is active. Disconnect from the active" +
-               " serial port before connecting" )
+	# Check the serial port state for the option 
+	port_active = zavDevice.is_active()
+	if   ( port_active and option == '-p' ):
+		print( PORT_ACTIVE_MSG.format( zavDevice.comport ) )
 		return 
-	elif ( (not zavDevice.is_active()) and option == '-d' ):
+	elif ( (not port_active) and option == '-d' ):
 		print( 'Error: No active serial port to disconnect from' )
 		return 
 
 	# Check for valid serial port
-	if ( len(Args) > 1 ):
-		available_ports = zavDevice.list_ports()
+	if   ( user_port is not None ):
+		avail_ports     = zavDevice.list_ports_cached()
+		available_ports = { port.device for port in avail_ports }
 		if ( not (user_port in available_ports) ):
-			print( "Error: Invalid serial port. Valid ports:" )
-			for port_num, port in enumerate( available_ports ):
-				print( "\t" + port )
+			port_list = [ "Error: Invalid serial port. Valid ports:\n" ]
+			for port in avail_ports:
+				port_list.append( f"\t{port.device}\n" )
+			sys.stdout.write( "".join( port_list ) )
 			return 
-	else:
-		if ( option == '-p' and
-		     len(Args)   == 1):
-			print( "Error: No serial port supplied " )
-			return 
-
-	##############################################################################
-    # Help Option (-h)                                                           #
-	##############################################################################
-	if ( option == '-h' ):
-		messageUtil.display_help_info( "connect" )
-		return 
-
-	##############################################################################
-    # Port Option (-p)                                                           #
-	##############################################################################
 	elif ( option == '-p' ):
-		# Open the serial comport
-		comports.comports( ['-c', user_port, '921600'], zavDevice )
-		
-		# Send the connect opcode 
-		zavDevice.sendByte( OPCODE )
-
-		# Get the board identifier 
-		controller_response = zavDevice.readByte()
-		if ( (controller_response == b''                    ) or
-             (not (controller_response in zavController.controller_codes) ) ):
-			print( "Controller connection was unsuccessful." )
-			comports.comports( ['-d'], zavDevice )
-			return 
-		else:
-			# Get the firmware version 
-			firmware_version = zavController.firmware_ids[zavDevice.readByte()]
-
-			# Set global controller variable 
-			zavDevice.set_controller(
-						zavController.controller_descriptions[controller_response],
-					    firmware_version	
-									)
-
-            # Display connection info									
-			print( "Connection established with " + 
-                    zavController.controller_descriptions[controller_response] )
-			print( "Firmware: " + firmware_version )
-			return 
-		
-
-	##############################################################################
-    # Disconnect Option (-d)                                                     #
-	##############################################################################
-	elif ( option == '-d' ):
-		comports.comports( ['-d'], zavDevice )
-		zavDevice.reset_controller()
+		print( "Error: No serial port supplied " )
 		return 
 
 	##############################################################################
-    # Unknown Option                                                             #
+	# Run the option                                                             #
 	##############################################################################
-	else:
-		print( "Error: unknown option passed to connect " +
-               "function" )	
+	connect_func = CONNECT_OPS.get( option )
+	if ( connect_func is None ):
+		print( "Error: unknown option passed to connect function" )	
 		messageUtil.error_msg()
 		return 
+	connect_func( zavDevice, user_port )
 ## connect ##
 
 
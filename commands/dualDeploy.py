@@ -15,28 +15,59 @@
 ####################################################################################
 
 # Standard imports
-import sys
 import os
-import time
 import datetime
-from   matplotlib import pyplot as plt
+import itertools
+import numpy as np
+import struct
 
 # Project imports
 import binUtil
-from   config      import *
-import commands
+import messageUtil
 import sensor_conv
+import validator
 
 
 ####################################################################################
 # Global Variables                                                                 #
 ####################################################################################
 
-# Serial port timeouts
-if ( zav_debug ):
-    DEFAULT_TIMEOUT = 100 # 100 second timeout
-else:
-    DEFAULT_TIMEOUT = 1   # 1 second timeout
+# Subcommand Dictionary
+INPUTS = { 
+         'help'   : {},
+         'status' : {},
+         'extract': {},
+         'plot'   : {}
+}
+
+# Maximum number of arguments
+MAX_ARGS = 1
+
+# Command type -- subcommand function
+COMMAND_TYPE = 'subcommand'
+
+# Command opcode
+OPCODE = b'\xA0'
+
+# Subcommand codes
+SUBCOMMAND_CODES = {
+                   'status' : b'\x01',
+                   'extract': b'\x02'
+}
+
+# Status response: main altitude, drogue delay, ground pressure, launch detect, 
+# apogee detect, main altitude detect, and landing detect sample rates. The 
+# ground pressure is kept as raw bytes for binUtil's erased flash handling
+STATUS_RESPONSE = struct.Struct( '<II4sIIII' )
+
+# Extract header: data logger status, main altitude, drogue delay, main deploy 
+# time, drogue deploy time, landing time, ground pressure
+EXTRACT_HEADER = struct.Struct( '<BIIIII4s' )
+
+# Flight data extract sizes, frames are read from the serial port in blocks
+EXTRACT_NUM_FRAMES   = 40960
+EXTRACT_FRAME_SIZE   = 12 # bytes
+EXTRACT_BLOCK_FRAMES = 4096
 
 
 ####################################################################################
@@ -47,51 +78,19 @@ else:
 ####################################################################################
 #                                                                                  #
 # PROCEDURE:                                                                       #
-#         sensor_extract_data_filter                                               #
+#         annotate_flight_events                                                   #
 #                                                                                  #
 # DESCRIPTION:                                                                     #
-#       Finds the end of valid data extracted from flash extract and return a list #
-#       containing only good data                                                  #
+#       Marks the main deployment, drogue deployment, and landing times on a plot  #
 #                                                                                  #
 ####################################################################################
-def sensor_extract_data_filter( data ):
-
-    # Indices of beginning and end of good data 
-    start_index = 0
-    end_index   = len( data ) - 1
-
-    # Search exit condition
-    exit = False
-
-    # Search index
-    search_index = 0
-    
-    # Begin binary search
-    while( not exit ):
-        # Set search index
-        search_index = ( (end_index - start_index)//2 ) + start_index
-
-        # Check if two consecutive rows are identically equal
-        rows_equal = ( data[search_index] == data[search_index+1] )
-
-        # Check for exit condition
-        if   (   search_index       == start_index ):
-            if ( rows_equal ):
-                return None
-            else:
-                return data[0:search_index-1]
-        elif ( ( search_index + 1 ) == end_index   ):
-            if ( rows_equal ):
-                return data[0:start_index-1]
-            else:
-                return data[0:end_index-1]
-        else: # No exit condfition
-            # Update search range
-            if ( rows_equal ):
-                end_index = search_index
-            else:
-                start_index = search_index
-## sensor_extract_data_filter ## 
+def annotate_flight_events( axis, main_deploy_time, drogue_deploy_time, 
+                            landing_time ):
+    axis.axvline( x = main_deploy_time  , color = 'b', label = "Main Deployment"   )
+    axis.axvline( x = drogue_deploy_time, color = 'r', label = "Drogue Deployment" )
+    axis.axvline( x = landing_time      , color = 'g', label = "Landed"            )
+    axis.legend()
+## annotate_flight_events ##
 
 
 ####################################################################################
@@ -109,40 +108,14 @@ def sensor_extract_data_filter( data ):
 #                                                                                  #
 ####################################################################################
 def dual_deploy( Args, zavDevice ):
-    ################################################################################
-    # Local Variables                                                              #
-    ################################################################################
-
-    # Options Dictionary
-    dual_deploy_inputs = { 
-                       'help'   : {},
-                       'status' : {},
-                       'extract': {},
-                       'plot'   : {}
-                         }
-    
-    # Maximum number of arguments
-    max_args = 1
-
-    # Opcode
-    opcode = b'\xA0'
-
-    # Subcommand opcodes
-    sub_opcodes = {
-                  'status' : b'\x01',
-                  'extract': b'\x02'
-                  }
-
-    # Command type -- subcommand function
-    command_type = 'subcommand'
 
     ################################################################################
     # Basic inputs parsing                                                         #
     ################################################################################
-    parse_check = validator.parseArgs( Args              ,
-                                      max_args          ,
-                                      dual_deploy_inputs,
-                                      command_type )
+    parse_check = validator.parseArgs( Args        ,
+                                      MAX_ARGS    ,
+                                      INPUTS      ,
+                                      COMMAND_TYPE )
     if ( not parse_check ):
         return # user inputs failed parse tests
 
@@ -166,7 +139,7 @@ def dual_deploy( Args, zavDevice ):
     # dual-deploy help                                                             #
     ################################################################################
     if ( subcommand == "help" ):
-        commands.display_help_info( "dual-deploy" )
+        messageUtil.display_help_info( "dual-deploy" )
         return 
 
 
@@ -176,22 +149,18 @@ def dual_deploy( Args, zavDevice ):
     elif ( subcommand == "status" ):
 
         # Send the dual-deploy/status opcode 
-        zavDevice.sendByte( opcode                )
-        zavDevice.sendByte( sub_opcodes['status'] )
-
-        # Receive the recovery programmed settings
-        main_alt     = binUtil.byte_array_to_int( zavDevice.readBytes( 4 ) )
-        drogue_delay = binUtil.byte_array_to_int( zavDevice.readBytes( 4 ) )
-
-        # Receive the ground pressure
-        ground_press = binUtil.byte_array_to_float( zavDevice.readBytes( 4 ) )
-        ground_press /= 1000
-
-        # Receive the sample rates, ms/sample
-        ld_sample_rate = binUtil.byte_array_to_int( zavDevice.readBytes( 4 ) )
-        ad_sample_rate = binUtil.byte_array_to_int( zavDevice.readBytes( 4 ) )
-        md_sample_rate = binUtil.byte_array_to_int( zavDevice.readBytes( 4 ) )
-        zd_sample_rate = binUtil.byte_array_to_int( zavDevice.readBytes( 4 ) )
+        zavDevice.sendBytes( OPCODE + SUBCOMMAND_CODES['status'] )
+
+        # Receive the recovery programmed settings, ground pressure, and sample 
+        # rates (ms/sample) in one read
+        status_bytes = zavDevice.readBytes( STATUS_RESPONSE.size ) or b''
+        if ( len( status_bytes ) != STATUS_RESPONSE.size ):
+            print( "Error: No response received from the flight computer" )
+            return 
+        ( main_alt      , drogue_delay  , ground_press_bytes, 
+          ld_sample_rate, ad_sample_rate, md_sample_rate    , 
+          zd_sample_rate ) = STATUS_RESPONSE.unpack( status_bytes )
+        ground_press = binUtil.float_at( ground_press_bytes )/1000
 
         # Display Results
         print( "Main Deployment Altitude        : " + str( main_alt       ) + " ft"  )
@@ -208,53 +177,55 @@ def dual_deploy( Args, zavDevice ):
     ################################################################################
     elif ( subcommand == "extract" ):
         # Send the dual-deploy/status opcode 
-        serialObj.sendByte( opcode                 )
-        serialObj.sendByte( sub_opcodes['extract'] )
-
-        # Get the data logger status to determine if header data is valid
-        status_byte = serialObj.readByte()
-        if ( status_byte != b'\x00' ):
+        zavDevice.sendBytes( OPCODE + SUBCOMMAND_CODES['extract'] )
+
+        # Receive the data logger status, recovery programmed settings, flight 
+        # events, and ground pressure in one read
+        header_bytes = zavDevice.readBytes( EXTRACT_HEADER.size ) or b''
+        if ( len( header_bytes ) != EXTRACT_HEADER.size ):
+            print( "Error: No response received from the flight computer" )
+            return 
+        ( status_byte     , main_alt          , drogue_delay, 
+          main_deploy_time, drogue_deploy_time, land_time   , 
+          ground_press_bytes ) = EXTRACT_HEADER.unpack( header_bytes )
+        ground_press = binUtil.float_at( ground_press_bytes )/1000
+
+        # Check the data logger status to determine if header data is valid
+        if ( status_byte != 0 ):
             print( "Error: The flash header is not valid. No flight data is " +
                    "available" )
 
-        # Receive the recovery programmed settings
-        main_alt     = binUtil.byte_array_to_int( serialObj.readBytes( 4 ) )
-        drogue_delay = binUtil.byte_array_to_int( serialObj.readBytes( 4 ) )
-
-        # Receive the flight events
-        main_deploy_time   = binUtil.byte_array_to_int( serialObj.readBytes( 4 ) )
-        drogue_deploy_time = binUtil.byte_array_to_int( serialObj.readBytes( 4 ) )
-        land_time          = binUtil.byte_array_to_int( serialObj.readBytes( 4 ) )
-
-        # Receive the ground pressure
-        ground_press       = binUtil.byte_array_to_float( serialObj.readBytes( 4 ) )
-        ground_press      /= 1000
-
-        # Receive the flight data
-        rx_blocks = []
-        for i in range( 40960 ):
-            if ( i%100 == 0 ):
-                print( "Reading block " + str( i ) )
-            rx_frame_block = serialObj.readBytes( 12 )
-            rx_blocks.append( rx_frame_block )
+        # Receive the flight data, one block of frames per read
+        extract_block_size = EXTRACT_BLOCK_FRAMES*EXTRACT_FRAME_SIZE
+        rx_frames = bytearray()
+        for frame_num in range( 0, EXTRACT_NUM_FRAMES, EXTRACT_BLOCK_FRAMES ):
+            print( "Reading block " + str( frame_num ) )
+            rx_block   = zavDevice.readBytes( extract_block_size ) or b''
+            rx_frames += rx_block
+            if ( len( rx_block ) != extract_block_size ):
+                print( "Error: Flight data transfer incomplete. Received " + 
+                       str( len( rx_frames ) ) + " of "                     + 
+                       str( EXTRACT_NUM_FRAMES*EXTRACT_FRAME_SIZE ) + " bytes" )
+                return 
         
         # Format the flight data
-        sensor_frames = zavDevice.getSensorFrames( rx_blocks )
-        sensor_frames_filtered = sensor_extract_data_filter( sensor_frames )
+        sensor_frames = zavDevice.getSensorFrames( rx_frames )
+        sensor_frames_filtered = sensor_conv.sensor_extract_data_filter( sensor_frames )
+        if ( len( sensor_frames_filtered ) == 0 ):
+            print( "Warning: No flight data found in flash" )
 
         # Croeate the output directory
         run_date = datetime.date.today()
         run_date = run_date.strftime("%m-%d-%Y")
-        if ( not ( os.path.exists( "output/dual-deploy" ) ) ):
-            os.mkdir( "output/dual-deploy" )
         base_output_dir = "output/dual-deploy/" + run_date
-        if ( not ( os.path.exists( base_output_dir ) ) ):
-            os.mkdir( base_output_dir )
-        test_num = 0
+        os.makedirs( base_output_dir, exist_ok = True )
+
+        # Next free data directory, found from one directory listing
+        with os.scandir( base_output_dir ) as output_dirs:
+            existing_dirs = { output_dir.name for output_dir in output_dirs }
+        test_num = next( num for num in itertools.count() 
+                         if ( "data" + str( num ) ) not in existing_dirs )
         output_dir = base_output_dir + "/data" + str( test_num )
-        while( os.path.exists( output_dir ) ):
-            test_num += 1
-            output_dir = base_output_dir + "/data" + str( test_num )
         os.mkdir( output_dir )
         
         # Export the header data
@@ -267,13 +238,9 @@ def dual_deploy( Args, zavDevice ):
             file.write( "Landing Time      : " + str( land_time          ) + " ms \n" )
 
         # Export the flight data
-        with open( output_dir + "/data.txt", 'w' ) as file:
-            for sensor_frame in sensor_frames_filtered:
-                for val in sensor_frame:
-                    file.write( str( val ) )
-                    file.write( '\t')
-                file.write( '\n' )    
-        return serialObj
+        np.savetxt( output_dir + "/data.txt", sensor_frames_filtered, 
+                    fmt = zavDevice.getSensorFrameFormat() )
+        return 
         # dual-deploy extract #
 
     ################################################################################
@@ -281,114 +248,68 @@ def dual_deploy( Args, zavDevice ):
     ################################################################################
     elif ( subcommand == 'plot' ):
 
-        # Find most recent date of data extraction 
-        base_data_dirs             = os.listdir( "output/dual-deploy" )
-        base_data_dirs_recent      = []
-        base_data_dirs_most_recent = []
-        max_month = 1
-        for base_data_dir in base_data_dirs:
-            month = base_data_dir[0:2]
-            month = int( month )
-            if ( month >= max_month ):
-                max_month = month
-        for base_data_dir in base_data_dirs:
-            month = base_data_dir[0:2]
-            month = int( month )
-            if ( month == max_month ):
-                base_data_dirs_recent.append( base_data_dir )
-        max_day = 0
-        for base_data_dir in base_data_dirs_recent:
-            day = base_data_dir[3:5]
-            day = int( day )
-            if ( day > max_day ):
-                max_day = day
-        for base_data_dir in base_data_dirs_recent:
-            day = base_data_dir[3:5]
-            day = int( day )
-            if ( day == max_day ):
-                base_data_dirs_most_recent.append( base_data_dir )
-        base_data_dir = base_data_dirs_most_recent[-1]
+        # matplotlib is slow to import and only needed for plotting
+        from matplotlib import pyplot as plt
+
+        # Find most recent date of data extraction, directories are named by 
+        # date as MM-DD-YYYY
+        base_data_dir = max( os.listdir( "output/dual-deploy" ), 
+                             key = lambda date_dir: ( int( date_dir[6:]  ), 
+                                                      int( date_dir[0:2] ), 
+                                                      int( date_dir[3:5] ) ) )
         base_data_dir = "output/dual-deploy/" + base_data_dir
 
         # Find most recent data
-        data_num = 0
-        while ( os.path.exists( base_data_dir + "/data" + str( data_num ) ) ):
-            data_num += 1
-        data_dir = base_data_dir + "/data" + str( data_num - 1 )
+        with os.scandir( base_data_dir ) as data_dirs:
+            data_num = max( int( data_dir.name[4:] ) for data_dir in data_dirs 
+                            if ( data_dir.is_dir()                 and 
+                                 data_dir.name.startswith( "data" ) and 
+                                 data_dir.name[4:].isdecimal() ) )
+        data_dir = base_data_dir + "/data" + str( data_num )
         header_filename = data_dir + "/header.txt"
         data_filename   = data_dir + "/data.txt"
 
-        # Extract the header data
+        # Extract the header data, one "label : value units" line per setting
         with open( header_filename, "r" ) as file:
-            header_lines = file.readlines()
-            header_lines_split = []
-            for line in header_lines:
-                header_lines_split.append( line.split() )
-        main_deploy_alt    = float( header_lines_split[0][3] )
-        drogue_delay       = float( header_lines_split[1][3] )
-        ground_press       = float( header_lines_split[2][3] )
-        main_deploy_time   = float( header_lines_split[3][4] )/1000.0
-        drogue_deploy_time = float( header_lines_split[4][3] )/1000.0
-        landing_time       = float( header_lines_split[5][3] )/1000.0
+            # The value is the first word after the colon, float() also 
+            # accepts the nan/inf an invalid ground pressure readout produces
+            header_values = [ line.split( ':', 1 )[1].split()[0] 
+                              for line in file if ( ':' in line ) ]
+        ( main_deploy_alt   , drogue_delay      , ground_press, 
+          main_deploy_time  , drogue_deploy_time, landing_time ) = map( float, header_values )
+        main_deploy_time   /= 1000.0
+        drogue_deploy_time /= 1000.0
+        landing_time       /= 1000.0
 
         # Extract the flight data
-        sensor_time     = []
-        sensor_pressure = []
-        sensor_temp     = []
-        with open( data_filename, "r" ) as file:
-            data_lines = file.readlines()
-            for line in data_lines:
-                data_line_split = line.split()
-                sensor_time.append    ( float( data_line_split[0] ) )
-                sensor_pressure.append( float( data_line_split[1] ) )
-                sensor_temp.append    ( float( data_line_split[2] ) )
+        sensor_time, sensor_pressure, sensor_temp = np.loadtxt( data_filename, 
+                                                                usecols = ( 0, 1, 2 ),
+                                                                ndmin   = 2, 
+                                                                unpack  = True )
                 
-        # Calculate Altitude
-        sensor_altitude = []
-        for press in sensor_pressure:
-            sensor_altitude.append( sensor_conv.pressure_to_alt( press, ground_press ) )
+        # Calculate Altitude, pressure_to_alt operates elementwise on arrays
+        sensor_altitude = sensor_conv.pressure_to_alt( sensor_pressure, ground_press )
         
-        # Plot Pressure data
-        plt.figure()
-        plt.plot( sensor_time, sensor_pressure )
-        plt.title( "Pressure Data" )
-        plt.xlabel( "Time, s" )
-        plt.ylabel( "Pressure, kPa" )
-        plt.grid()
-        plt.axvline( x = main_deploy_time  , color = 'b', label = "Main Deployment"   )
-        plt.axvline( x = drogue_deploy_time, color = 'r', label = "Drogue Deployment" )
-        plt.axvline( x = landing_time      , color = 'g', label = "Landed"            )
-        plt.legend()
+        # Plot the pressure, temperature, and altitude data on one figure 
+        fig, axes = plt.subplots( 3, 1, sharex = True, figsize = ( 10, 8 ) )
+        plot_data = [
+                    ( sensor_pressure, "Pressure Data"   , "Pressure, kPa"          ),
+                    ( sensor_temp    , "Temperature Data", "Temperature, Degrees C" ),
+                    ( sensor_altitude, "Altitude Data"   , "Altitude, ft"           )
+                    ]
+        for axis, ( sensor_data, title, ylabel ) in zip( axes, plot_data ):
+            axis.plot( sensor_time, sensor_data )
+            axis.set_title( title )
+            axis.set_ylabel( ylabel )
+            axis.grid()
+            annotate_flight_events( axis, main_deploy_time, drogue_deploy_time, 
+                                    landing_time )
+        axes[-1].set_xlabel( "Time, s" )
+        fig.tight_layout()
         plt.show( block = False )
+        return 
 
-        # Plot Temperature Data
-        plt.figure()
-        plt.plot( sensor_time, sensor_temp )
-        plt.title( "Temperature Data" )
-        plt.xlabel( "Time, s" )
-        plt.ylabel( "Temperature, Degrees C" )
-        plt.grid()
-        plt.axvline( x = main_deploy_time  , color = 'b', label = "Main Deployment"   )
-        plt.axvline( x = drogue_deploy_time, color = 'r', label = "Drogue Deployment" )
-        plt.axvline( x = landing_time      , color = 'g', label = "Landed"            )
-        plt.legend()
-        plt.show( block = False )
-
-        # Plot Altitude Data
-        plt.figure()
-        plt.plot( sensor_time, sensor_altitude )
-        plt.title( "Altitude Data" )
-        plt.xlabel( "Time, s" )
-        plt.ylabel( "Altitude, ft" )
-        plt.grid()
-        plt.axvline( x = main_deploy_time  , color = 'b', label = "Main Deployment"   )
-        plt.axvline( x = drogue_deploy_time, color = 'r', label = "Drogue Deployment" )
-        plt.axvline( x = landing_time      , color = 'g', label = "Landed"            )
-        plt.legend()
-        plt.show( block = False )
-        return serialObj
-
-    return serialObj 
+    return 
 ## dual_deploy ##
 
 
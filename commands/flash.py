@@ -15,15 +15,15 @@
 
 # Standard 
 import datetime
+import numpy as np
 import os
+import queue
+import threading
 import time
 
 # Project
-import binUtil
-import config
 import commands
 import messageUtil
-import sensor_conv
 import validator
 import zavController
 
@@ -32,12 +32,6 @@ import zavController
 # Global Variables                                                                 #
 ####################################################################################
 
-# Run config
-if ( config.zav_debug ):
-    default_timeout = 100 # 100 second timeout
-else:
-    default_timeout = 1   # 1 second timeout
-
 # Subcommand and Options Dictionary
 INPUTS = { 
     'enable'  : {
@@ -87,12 +81,203 @@ ERASE_CODE   = b'\x05'
 STATUS_CODE  = b'\x06'  
 EXTRACT_CODE = b'\x07'  
 
+# Flash status register bits, least significant bit first
+STATUS_BITS = [
+              ( "BUSY", 0x01 ),
+              ( "WEL ", 0x02 ),
+              ( "BP0 ", 0x04 ),
+              ( "BP1 ", 0x08 ),
+              ( "BP2 ", 0x10 ),
+              ( "BP3 ", 0x20 ),
+              ( "AAI ", 0x40 ),
+              ( "BPL ", 0x80 )
+              ]
+
+# Size of the external flash in bytes
+FLASH_SIZE = 524288
+
+# Extract blocks for each controller: sensor frame size, number of frames in 
+# flash, and number of unused bytes at the end of flash
+EXTRACT_PARAMS = { controller: ( frame_size, ) + divmod( FLASH_SIZE, frame_size ) 
+                   for controller, frame_size in zavController.sensor_frame_sizes.items() }
+
+# Number of sensor frames received per serial read during extract
+EXTRACT_BLOCK_FRAMES = 4096
+
 
 ####################################################################################
 # Procedures                                                                       #
 ####################################################################################
 
 
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+#         parse_byte_option                                                        #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+#         checks and converts the byte supplied with the -b option. Format: 0xXX   #
+#         where XX is a hex number                                                 #
+#                                                                                  #
+####################################################################################
+def parse_byte_option( byte_input ):
+
+    # Check for 0x prefix
+    if( byte_input[0:2] != '0x'):
+        print("Error: Invalid byte format. " +
+              " Missing 0x prefix")
+        return None
+
+    # Convert to byte, fromhex also rejects non-hex digits
+    try:
+        byte = bytes.fromhex( byte_input[2:] )
+    except ValueError:
+        print('Error: Invalid byte.')
+        return None
+
+    # Check length
+    if ( len( byte ) != 1 ):
+        print('Error: Invalid byte format.')
+        return None
+    return { 'byte': byte }
+## parse_byte_option ##
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+#         parse_string_option                                                      #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+#         checks the string supplied with the -s option                            #
+#                                                                                  #
+####################################################################################
+def parse_string_option( string_input ):
+    # Currently no parse checks needed
+    return {}
+## parse_string_option ##
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+#         parse_num_bytes_option                                                   #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+#         checks and converts the number of bytes supplied with the -n option      #
+#                                                                                  #
+####################################################################################
+def parse_num_bytes_option( num_bytes_input ):
+
+    # Verify number of bytes is an integer
+    try:
+        num_bytes = int( num_bytes_input, 0)
+    except ValueError:
+        print('Error: Invalid number of bytes.')
+        return None
+
+    # Verify numbers of bytes is in range
+    if ( num_bytes <= 0 or num_bytes > MAX_NUM_BYTES ): 
+        print( "Error: Invalid number of bytes." )
+        return None
+
+    return { 'num_bytes': num_bytes }
+## parse_num_bytes_option ##
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+#         parse_address_option                                                     #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+#         checks and converts the memory address supplied with the -a option.      #
+#         Format: 0xXXXXXX                                                         #
+#                                                                                  #
+####################################################################################
+def parse_address_option( address_input ):
+
+    # Check for 0x prefix
+    if( address_input[0:2] != '0x' ):
+        print("Error: Invalid Address format. " +
+              " Missing 0x prefix")
+        return None
+
+    # Convert to bytes, fromhex also rejects non-hex digits
+    try:
+        address_bytes = bytes.fromhex( address_input[2:] )
+    except ValueError:
+        print('Error: Invalid Address.')
+        return None
+
+    # Check length
+    if ( len( address_bytes ) != 3 ):
+        print('Error: Invalid Address format.')
+        return None
+    return { 'address_bytes': address_bytes }
+## parse_address_option ##
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+#         parse_file_option                                                        #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+#         checks the file supplied with the -f option                              #
+#                                                                                  #
+####################################################################################
+def parse_file_option( file_input ):
+    # Verify output file doesn't already exist 
+    # Verify input file exists
+    return {}
+## parse_file_option ##
+
+
+# Option input parsers, each returns the parsed values or None if the input is 
+# invalid
+OPTION_PARSERS = {
+                 '-b' : parse_byte_option     ,
+                 '-s' : parse_string_option   ,
+                 '-n' : parse_num_bytes_option,
+                 '-a' : parse_address_option  ,
+                 '-f' : parse_file_option
+}
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+#         extract_reader                                                           #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+#         receives the flash extract data in blocks of frames and queues a view    #
+#         of each block for conversion. None is queued once all data has been      #
+#         received or the transfer fails                                           #
+#                                                                                  #
+####################################################################################
+def extract_reader( zavDevice, rx_blocks, frame_size, num_frames, num_unused_bytes ):
+    try:
+        # Blocks are read in place into one preallocated buffer and queued as 
+        # views, no per-block bytes objects are created
+        extract_num_bytes  = num_frames*frame_size
+        extract_block_size = EXTRACT_BLOCK_FRAMES*frame_size
+        rx_buffer          = memoryview( bytearray( extract_num_bytes ) )
+        for block_start in range( 0, extract_num_bytes, extract_block_size ):
+            print( "Reading block " + str( block_start//frame_size ) + "..."  )
+            block_size = min( extract_block_size, extract_num_bytes - block_start )
+            num_rx     = zavDevice.readInto( rx_buffer[block_start:block_start+block_size] )
+            rx_blocks.put( rx_buffer[block_start:block_start+num_rx] )
+            if ( num_rx < block_size ):
+                return # read timed out
+
+        # Receive the unused bytes
+        zavDevice.readBytes( num_unused_bytes )
+    finally:
+        rx_blocks.put( None )
+## extract_reader ##
+
+
 ####################################################################################
 #                                                                                  #
 # PROCEDURE:                                                                       #
@@ -108,11 +293,6 @@ def flash( Args, zavDevice ):
     # Local Variables                                                              #
     ################################################################################
 
-    # Extract blocks
-    EXTRACT_FRAME_SIZE       = zavController.sensor_frame_sizes[zavDevice.controller]
-    EXTRACT_NUM_FRAMES       = 524288 // EXTRACT_FRAME_SIZE 
-    EXTRACT_NUM_UNUSED_BYTES = 524288 %  EXTRACT_FRAME_SIZE 
-
     # flash IO data
     byte            = None
     string          = None
@@ -151,11 +331,9 @@ def flash( Args, zavDevice ):
             print("Error: Not enough options/inputs")
             return
         else:
-            options = [Args_options[0], Args_options[2]]
-            inputs  = {
-                       options[0] : Args_options[1],
-                       options[1] : Args_options[3]
-                    }
+            # Pair each option with the input data that follows it
+            inputs  = dict( zip( Args_options[0::2], Args_options[1::2] ) )
+            options = list( inputs )
             options_command = True
     else:
         options_command = False
@@ -169,92 +347,23 @@ def flash( Args, zavDevice ):
     if ( options_command ):
 
         # Check for duplicate options
-        if ( options[0] == options[1] ):
+        if ( len( options ) != len( Args_options )//2 ):
             print('Error: Duplicate option supplied')
             return
 
         # Perform option specific checks
+        parsed_inputs = {}
         for option in options:
-
-            ################# -b option #######################
-            if ( option == '-b' ):
-                # Check byte is formatted correctly
-                # Format: 0xXX --> XX is a hex number
-
-                # Check length
-                if( len( inputs[option] ) != 4):
-                    print('Error: Invalid byte format.')
-                    return
-                
-                # Check for 0x prefix
-                if( inputs[option][0:2] != '0x'):
-                    print("Error: Invalid byte format. " +
-                          " Missing 0x prefix")
-
-                # Convert to integer
-                try:
-                    byte_int = int( inputs[option], 0 )
-                except ValueError:
-                    print('Error: Invalid byte.')
-                    return
-
-                # Convert to byte
-                byte = byte_int.to_bytes(1, 'big')
-                
-
-            ################# -s option #######################
-            elif ( option == '-s' ):
-                # Currently no parse checks needed
-                pass
-
-            ################# -n option #######################
-            elif ( option == '-n' ):
-                # Verify number of bytes is an integer
-                try:
-                    num_bytes = int( inputs[option], 0)
-                except ValueError:
-                    print('Error: Invalid number of bytes.')
-                    return
-
-                # Verify numbers of bytes is in range
-                if ( num_bytes <= 0 or num_bytes > MAX_NUM_BYTES ): 
-                    print( "Error: Invalid number of bytes." )
-                    return
-
-            ################# -a option #######################
-            elif ( option == '-a' ):
-                # Check address is formatted correctly
-                # Format: 0xXXXXXX
-
-                # Check length
-                if( len( inputs[option] ) != 8):
-                    print('Error: Invalid Address format.')
-                    return
-                
-                # Check for 0x prefix
-                if( inputs[option][0:2] != '0x' ):
-                    print("Error: Invalid byte format. " +
-                          " Missing 0x prefix")
-
-                # Convert to integer
-                try:
-                    address_int = int( inputs[option], 0 )
-                except ValueError:
-                    print('Error: Invalid Address.')
-                    return
-
-                # Convert to bytes
-                address_bytes = address_int.to_bytes(
-                                                    3, 
-                                                    byteorder='big',
-                                                    signed=False
-                                                    )
-
-            ################# -f option #######################
-            elif ( option == '-f' ):
-                # Verify output file doesn't already exist 
-                # Verify input file exists
-                pass
+            option_parser = OPTION_PARSERS.get( option )
+            if ( option_parser is None ):
+                continue
+            option_values = option_parser( inputs[option] )
+            if ( option_values is None ):
+                return
+            parsed_inputs.update( option_values )
+        byte          = parsed_inputs.get( 'byte'          )
+        num_bytes     = parsed_inputs.get( 'num_bytes'     )
+        address_bytes = parsed_inputs.get( 'address_bytes' )
 
         # Verify read and write subcommands have an address supplied    
         if (   subcommand == 'write' 
@@ -280,8 +389,7 @@ def flash( Args, zavDevice ):
     elif ( subcommand == "enable" ):
 
         # Send Opcode/Subcommand
-        zavDevice.sendByte( OPCODE      )
-        zavDevice.sendByte( ENABLE_CODE )
+        zavDevice.sendBytes( OPCODE + ENABLE_CODE )
 
         # Reconfigure Controller
         zavDevice.flashWriteEnable()
@@ -294,8 +402,7 @@ def flash( Args, zavDevice ):
     elif ( subcommand == "disable" ):
 
         # Send the Opcode/Subcommand
-        zavDevice.sendByte( OPCODE       )
-        zavDevice.sendByte( DISABLE_CODE )
+        zavDevice.sendBytes( OPCODE + DISABLE_CODE )
 
         zavDevice.flashWriteDisable()
         return
@@ -307,29 +414,24 @@ def flash( Args, zavDevice ):
     elif ( subcommand == "status" ):
 
         # Send command/subcommand codes 
-        zavDevice.sendByte( OPCODE      )
-        zavDevice.sendByte( STATUS_CODE )
+        zavDevice.sendBytes( OPCODE + STATUS_CODE )
 
         # Recieve the contents of the flash status register 
-        status_register     = zavDevice.readByte()
-        status_register_int = ord( status_register     )
+        status_register   = zavDevice.readByte()
         flash_status_code = zavDevice.readByte()
 
         # Parse return code
-        if (status_register == b''):
+        if ( not status_register ):
             print("Error: No response recieved from " +
                   "controller")
         else:
-            print("Status register contents: \n") 
-            print( "BUSY: ", binUtil.get_bit( status_register_int, 0 ) )
-            print( "WEL : ", binUtil.get_bit( status_register_int, 1 ) )
-            print( "BP0 : ", binUtil.get_bit( status_register_int, 2 ) )
-            print( "BP1 : ", binUtil.get_bit( status_register_int, 3 ) )
-            print( "BP2 : ", binUtil.get_bit( status_register_int, 4 ) )
-            print( "BP3 : ", binUtil.get_bit( status_register_int, 5 ) )
-            print( "AAI : ", binUtil.get_bit( status_register_int, 6 ) )
-            print( "BPL : ", binUtil.get_bit( status_register_int, 7 ) )
-            print( )
+            status_register_int = status_register[0]
+            status_lines = [ "Status register contents: \n\n" ]
+            for bit_name, bit_mask in STATUS_BITS:
+                status_lines.append( bit_name + ":  " + 
+                                     ( "1" if ( status_register_int & bit_mask ) else "0" ) + 
+                                     "\n" )
+            print( "".join( status_lines ) )
 
         return
 
@@ -354,18 +456,9 @@ def flash( Args, zavDevice ):
 
         ################### -b option #########################
         elif ( byte != None ):
-            # Send command/subcommand codes 
-            zavDevice.sendByte( OPCODE     )
-            zavDevice.sendByte( WRITE_CODE )
-            
-            # Send base address
-            zavDevice.sendBytes( address_bytes )
-
-            # Send number of bytes to write
-            zavDevice.sendBytes( b'\x01' )
-
-            # Send byte to write to flash
-            zavDevice.sendByte( byte )
+            # Send command/subcommand codes, base address, number of bytes to 
+            # write, and the byte to write to flash in one transmission
+            zavDevice.sendBytes( OPCODE + WRITE_CODE + address_bytes + b'\x01' + byte )
 
             print("Flash write successful")
             return
@@ -401,28 +494,20 @@ def flash( Args, zavDevice ):
         ################### -n option #########################
         elif( num_bytes != None ):
 
-            # Send command/subcommand codes 
-            zavDevice.sendByte( OPCODE    )
-            zavDevice.sendByte( READ_CODE )
-            
-            # Send base address
-            zavDevice.sendBytes( address_bytes )
-
-            # Send number of bytes to read
+            # Send command/subcommand codes, base address, and number of bytes 
+            # to read in one transmission
             num_bytes_byte = num_bytes.to_bytes( 1, 
                                            byteorder = 'big', 
                                            signed = False )
-            zavDevice.sendByte( num_bytes_byte )
+            zavDevice.sendBytes( OPCODE + READ_CODE + address_bytes + num_bytes_byte )
 
-            # Receive Bytes into a byte array
-            rx_bytes = []
-            for i in range( num_bytes ):
-                rx_bytes.append( zavDevice.readByte() )
+            # Receive all bytes in one read
+            rx_bytes = zavDevice.readBytes( num_bytes ) or b''
 
             # Display Bytes on the terminal
             print( "Received bytes: \n" )
             for rx_byte in rx_bytes:
-                print( rx_byte, ", ", end = "" )
+                print( bytes( ( rx_byte, ) ), ", ", end = "" )
             print()
 
             return
@@ -439,8 +524,7 @@ def flash( Args, zavDevice ):
     elif ( subcommand == "erase" ):
         
         # Send command/subcommand codes 
-        zavDevice.sendByte( OPCODE     )
-        zavDevice.sendByte( ERASE_CODE )
+        zavDevice.sendBytes( OPCODE + ERASE_CODE )
         print( "Flash erase sucessful" )
         return
 
@@ -450,62 +534,68 @@ def flash( Args, zavDevice ):
     ################################################################################
     elif ( subcommand == "extract" ):
 
-        # Send command/subcommand codes 
-        zavDevice.sendByte( OPCODE       )
-        zavDevice.sendByte( EXTRACT_CODE )
-
-        # Start timer
-        start_time = time.perf_counter()
-
-        # Recieve Data 
-        rx_byte_blocks = []
-        for i in range( EXTRACT_NUM_FRAMES ):
-            if ( i%100 == 0 ):
-                print( "Reading block " + str(i) + "..."  )
-            rx_sensor_frame_block = zavDevice.getSensorFrameBytes()
-            rx_byte_blocks.append( rx_sensor_frame_block )
-        
-        # Receive the unused bytes
-        unused_bytes = zavDevice.readBytes( EXTRACT_NUM_UNUSED_BYTES )
+        # Extract blocks
+        EXTRACT_FRAME_SIZE, EXTRACT_NUM_FRAMES, EXTRACT_NUM_UNUSED_BYTES = (
+                                            EXTRACT_PARAMS[zavDevice.controller] )
 
-        # Record ending time
-        extract_time = time.perf_counter() - start_time
-
-        # Convert the data from bytes to measurement readouts
-        sensor_frames = zavDevice.getSensorFrames( rx_byte_blocks )
+        # Send command/subcommand codes 
+        zavDevice.sendBytes( OPCODE + EXTRACT_CODE )
 
         # Set Create Output Data folder -> output/extract/controller/date
-        if ( not os.path.exists( "output" ) ):
-            os.mkdir( "output" )
-        output_dir = "output/extract/"
-        if ( not os.path.exists( output_dir ) ):
-            os.mkdir( output_dir )
-        output_dir += zavDevice.controller + "/"
-        if ( not os.path.exists( output_dir ) ):
-            os.mkdir( output_dir )
         run_date = datetime.date.today()
         run_date = run_date.strftime( "%m-%d-%Y" )
-        output_dir += run_date
-        if ( not os.path.exists( output_dir ) ):
-            os.mkdir( output_dir )
+        output_dir = "output/extract/" + zavDevice.controller + "/" + run_date
+        os.makedirs( output_dir, exist_ok = True )
 
-        # Determine file name so as to not overwrite old data
+        # Determine file name so as to not overwrite old data, the next test 
+        # number follows the highest existing one
         base_filename = "sensor_data"
-        test_num = 0
+        with os.scandir( output_dir ) as output_files:
+            test_num = 1 + max( ( int( output_file.name[len( base_filename ):-4] ) 
+                                  for output_file in output_files 
+                                  if ( output_file.name.startswith( base_filename ) and 
+                                       output_file.name.endswith( ".txt" )          and 
+                                       output_file.name[len( base_filename ):-4].isdecimal() ) ), 
+                                default = -1 )
         output_filename = output_dir + "/" + base_filename + str( test_num ) + ".txt"
-        while ( os.path.exists( output_filename ) ):
-            test_num += 1
-            output_filename = output_dir + "/" + base_filename + str( test_num ) + ".txt"
 
-        # Export the data to txt files
+        # Start timer
+        start_time = time.perf_counter()
+
+        # Recieve Data on a background thread, one block of frames per read, so 
+        # that converting and exporting a block overlaps receiving the next
+        rx_blocks = queue.Queue()
+        reader    = threading.Thread( target = extract_reader, 
+                                      args   = ( zavDevice               , 
+                                                 rx_blocks               , 
+                                                 EXTRACT_FRAME_SIZE      , 
+                                                 EXTRACT_NUM_FRAMES      , 
+                                                 EXTRACT_NUM_UNUSED_BYTES ) )
+        reader.start()
+
+        # Convert each block from bytes to measurement readouts and export the 
+        # data to txt files
+        num_rx_bytes = 0
+        frame_format = zavDevice.getSensorFrameFormat()
         with open( output_filename, 'w' ) as file:
-            for sensor_frame in sensor_frames:
-                for val in sensor_frame:
-                    file.write( str( val ) )
-                    file.write( '\t')
-                file.write( '\n' )    
+            rx_block = rx_blocks.get()
+            while ( rx_block is not None ):
+                num_rx_bytes += len( rx_block )
+                sensor_frames = zavDevice.getSensorFrames( rx_block )
+                np.savetxt( file, sensor_frames, fmt = frame_format )
+                rx_block = rx_blocks.get()
+        reader.join()
+
+        # Record ending time
+        extract_time = time.perf_counter() - start_time
 
         # Parse return code
+        extract_num_bytes = EXTRACT_NUM_FRAMES*EXTRACT_FRAME_SIZE
+        if ( num_rx_bytes < extract_num_bytes ):
+            print( "Error: Flash extract incomplete. Received " + str( num_rx_bytes ) + 
+                   " of " + str( extract_num_bytes ) + " bytes, partial data saved to " + 
+                   output_filename )
+            return
         print( "Flash extract successful" )
         print( "Extract time: {:.3f} sec".format( extract_time ) )
         return
@@ -12,8 +12,6 @@
 ####################################################################################
 # Imports                                                                          #
 ####################################################################################
-import config
-import commands
 import messageUtil
 import validator
 
@@ -22,12 +20,6 @@ import validator
 # Global Variables                                                                 #
 ####################################################################################
 
-# Run config
-if ( config.zav_debug ):
-    default_timeout = 100 # 100 second timeout
-else:
-    default_timeout = 1   # 1 second timeout
-
 # Ignition return codes
 IGN_SUCCESS_CODE     = b'\x01'
 IGN_SWITCH_FAIL      = b'\x02'
@@ -57,6 +49,13 @@ MAIN_CODE   = b'\x01'
 DROGUE_CODE = b'\x02'    
 CONT_CODE   = b'\x03'
 
+# Continuity response bits
+CONT_BITS = (
+            ( "Switch:       ", 0x01 ),
+            ( "Main Ematch:  ", 0x02 ),
+            ( "Drogue Ematch:", 0x04 )
+            )
+
 # Return messages
 RETURN_MESSAGES = {
     b''     : "Ignition unsuccessful. No response code received from flight computer",
@@ -75,6 +74,54 @@ RETURN_MESSAGES = {
 ####################################################################################
 
 
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+#         ignite_status_report                                                     #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+#         displays the result of an ignition from its response code                #
+#                                                                                  #
+####################################################################################
+def ignite_status_report( response ):
+    print( RETURN_MESSAGES.get( response, RETURN_MESSAGES[IGN_UNRECOGNIZED_CMD] ) )
+## ignite_status_report ##
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+#         ignite_cont_report                                                       #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+#         displays the switch and ematch continuity from the continuity response   #
+#                                                                                  #
+####################################################################################
+def ignite_cont_report( response ):
+
+    # The response is the continuity byte followed by the status code
+    if ( len( response ) < 1 ):
+        print( "Error: No response received from the flight computer" )
+        return
+
+    # Bytes index as integers, report each continuity bit
+    ign_cont = response[0]
+    cont_lines = []
+    for cont_label, cont_mask in CONT_BITS:
+        cont_lines.append( cont_label + " " + 
+                           ( "Connected" if ( ign_cont & cont_mask ) else "Disconnected" ) )
+    print( "\n".join( cont_lines ) )
+## ignite_cont_report ##
+
+
+# Ignite transactions: subcommand code, number of response bytes, response handler
+IGNITE_OPS = {
+             'main'  : ( MAIN_CODE  , 1, ignite_status_report ),
+             'drogue': ( DROGUE_CODE, 1, ignite_status_report ),
+             'cont'  : ( CONT_CODE  , 2, ignite_cont_report   )
+}
+
+
 ####################################################################################
 #                                                                                  #
 # PROCEDURE:                                                                       #
@@ -114,81 +161,23 @@ def ignite( Args, zavDevice ):
 
 
     ################################################################################
-    # Subcommand: ignite main                                                      #
+    # Subcommands: ignite main, drogue, cont                                       #
     ################################################################################
-    elif ( subcommand == "main" ):
-
-        # Send ignite opcode/subcommand
-        zavDevice.sendByte( OPCODE    )
-        zavDevice.sendByte( MAIN_CODE )
-
-        # Get ignition status code
-        ign_status = zavDevice.readByte()
-
-        # Show result 
-        print( RETURN_MESSAGES[ign_status] )
-        return
-
-    ################################################################################
-    # Subcommand: ignite  drogue                                                   #
-    ################################################################################
-    elif ( subcommand == "drogue" ):
-
-        # Send ignite opcode
-        zavDevice.sendByte( OPCODE      )
-        zavDevice.sendByte( DROGUE_CODE )
-
-        # Get ignition status code
-        ign_status = zavDevice.readByte()
-
-        # Show result 
-        print( RETURN_MESSAGES[ign_status] )
-        return
-
-    ################################################################################
-    # Subcommand: ignite cont                                                      #
-    ################################################################################
-    elif ( subcommand == "cont" ):
-
-        # Send opcode/subcommand
-        zavDevice.sendByte( OPCODE    )
-        zavDevice.sendByte( CONT_CODE )
-
-        # Get ignition status code
-        ign_cont   = zavDevice.readByte()
-        ign_status = zavDevice.readByte()
-
-        # Parse response code
-        ign_cont = ord( ign_cont )
-
-        # Switch continuity
-        if ( ( ign_cont >> 0 ) & 1 ):
-            print("Switch:        Connected")
-        else: 
-            print("Switch:        Disconnected")
-
-        # Main ematch continuity
-        if ( ( ign_cont >> 1 ) & 1 ):
-            print("Main Ematch:   Connected")
-        else: 
-            print("Main Ematch:   Disconnected")
-
-        # Drogue continuity
-        if ( ( ign_cont >> 2 ) & 1 ):
-            print("Drogue Ematch: Connected")
-        else: 
-            print("Drogue Ematch: Disconnected")
-
-        return
-
-    ################################################################################
-    # Unknown Subcommand                                                           #
-    ################################################################################
-    else:
+    ignite_op = IGNITE_OPS.get( subcommand )
+    if ( ignite_op is None ):
         print("Error: unknown subcommand passed to ignite " +
               "function")    
         messageUtil.error_msg()
         return
+    subcommand_code, response_size, response_handler = ignite_op
+
+    # Send ignite opcode/subcommand and get the response in one read
+    zavDevice.sendBytes( OPCODE + subcommand_code )
+    response = zavDevice.readBytes( response_size ) or b''
+
+    # Show result 
+    response_handler( response )
+    return
 
 ## ignite ##
 
@@ -22,11 +22,94 @@ import messageUtil
 import zavController
 
 
+####################################################################################
+# Global Variables                                                                 #
+####################################################################################
+
+# Error messages
+NO_CONNECTION_MSG = ( "Error: no active serial port connection. Run the " 
+                      "comports -c command to connect to a device" )
+TOO_MANY_ARGS_MSG = "Error: too many options/arguments supplied to ping function"
+
+# Ping response messages
+PING_RESPONSE_MSG         = "Response recieved at {0:1.4f} ms from {1}"
+PING_UNKNOWN_RESPONSE_MSG = "Response recieved at {0:1.4f} ms from an unknown device"
+
+
 ####################################################################################
 # Procedures                                                                       #
 ####################################################################################
 
 
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		ping_help                                                                  #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		displays the ping help info (-h)                                           #
+#                                                                                  #
+####################################################################################
+def ping_help( zavDevice, input_timeout ):
+    messageUtil.display_help_info( 'ping' )
+## ping_help ##
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		ping_target                                                                #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		pings the connected board and reports the round trip time (-t)             #
+#                                                                                  #
+####################################################################################
+def ping_target( zavDevice, input_timeout ):
+    # ping has already checked for an active serial port connection
+    if ( input_timeout is None ):
+        print( "Error: no ping timeout supplied" )
+        return 
+
+    # Bind the calls made between the timestamps so attribute lookups aren't 
+    # included in the round trip time
+    send_byte    = zavDevice.sendByte
+    read_exactly = zavDevice.readExactly
+    ping_buffer  = zavDevice.ping_buffer
+    clock        = time.perf_counter_ns
+
+    # Set timeout before timing, changing the port timeout reconfigures the 
+    # port so skip it when repeated pings use the same timeout
+    if ( zavDevice.timeout != input_timeout ):
+        zavDevice.timeout = input_timeout
+        zavDevice.configComport()
+
+    # Ping
+    opcode = b'\x01'
+    print( "Pinging ..." )
+    ping_start_time = clock()
+    send_byte( opcode )
+    num_rx_bytes = read_exactly( ping_buffer, input_timeout )
+    ping_recieve_time = clock()
+    if ( num_rx_bytes == 0 ):
+        print( "Timeout expired. No device response recieved." )
+    else:
+        pingData = ping_buffer[0]
+        ping_time = ( ping_recieve_time - ping_start_time )/1.0e6 # ms
+        controller_description = zavController.controller_descriptions.get( pingData )
+        if ( controller_description is not None ):
+            print( PING_RESPONSE_MSG.format( ping_time, controller_description ) )
+        else:
+            print( PING_UNKNOWN_RESPONSE_MSG.format( ping_time ) )
+## ping_target ##
+
+
+# Option handlers
+PING_OPS = {
+           '-h' : ping_help,
+           '-t' : ping_target
+}
+
+
 ####################################################################################
 #                                                                                  #
 # COMMAND:                                                                         #
@@ -41,82 +124,37 @@ def ping( Args, zavDevice ):
 
     # Check for an active serial port connection and valid 
     # options/arguments
-    if ( not zavDevice.is_active() ):
-        print( "Error: no active serial port connection. "  +
-               "Run the comports -c command to connect to " +
-               "a device" )
+    if   ( not zavDevice.is_active() ):
+        print( NO_CONNECTION_MSG )
         return 
-    if   ( len(Args) < 1 ):
+    elif ( len(Args) < 1 ):
         print("Error: no options supplied to ping function")
         return 
     elif ( len(Args) > 2 ):
-        print( "Error: too many options/arguments supplied " +
-               "to ping function" )
-    else:
+        print( TOO_MANY_ARGS_MSG )
+        return 
 
-        # Arguments parsing
-        option = Args[0]
-        timeout_supplied = False
-        if ( len(Args) == 2 ):
+    # Arguments parsing
+    option        = Args[0]
+    input_timeout = None
+    if ( len(Args) == 2 ):
+        # Plain decimal timeouts skip the exception handling, other 
+        # float formats (ex. 1e-3) fall back to float's parser
+        if ( Args[1].replace( '.', '', 1 ).isdecimal() ):
+            input_timeout = float( Args[1] )
+        else:
             try:
                 input_timeout = float( Args[1] )
-                timeout_supplied = True
             except ValueError:
                 print( "Error: Invalid ping timeout." )
                 return 
 
-        # Help option
-        if ( option == "-h" ):
-            messageUtil.display_help_info( 'ping' )
-            return 
-
-        # Ping option
-        elif ( option == "-t" ):
-            # Check for valid serial port connection
-            if ( not zavDevice.is_active() ):
-                print( "Error: no active serial port "    +
-                       "connection. Run the comports -c " +
-                       "command to connect to a device" )
-                return 
-
-            # Set timeout
-            zavDevice.timeout = input_timeout
-            zavDevice.configComport()
-
-            # Ping
-            opcode = b'\x01'
-            ping_start_time = time.time()
-            zavDevice.sendByte( opcode )
-            print( "Pinging ..." )
-            pingData = zavDevice.readByte()
-            if ( pingData == b'' ):
-                print( "Timeout expired. No device " +
-                       "response recieved." )
-            else:
-                ping_recieve_time = time.time()
-                ping_time = ping_recieve_time - ping_start_time
-                ping_time *= 1000.0
-                if ( pingData in zavController.controller_codes ):
-                    print( 
-                           ("Response recieved at {0:1.4f} ms " +
-                            "from {1}").format(
-                                ping_time, 
-                                zavController.controller_descriptions[pingData]
-                                              )
-                         )
-                else:
-                    print( 
-                           ("Response recieved at {0:1.4f} ms " +
-                           "from an unknown device").format(
-                                                           ping_time
-                                                           )
-                         )
-            return 
-
-        # Ping option 
-        else:
-            print("Error: invalid option supplied to ping function")
-            return 
+    # Run the option
+    ping_func = PING_OPS.get( option )
+    if ( ping_func is None ):
+        print("Error: invalid option supplied to ping function")
+        return 
+    ping_func( zavDevice, input_timeout )
 ## ping ##
 
 
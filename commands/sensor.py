@@ -14,14 +14,15 @@
 ####################################################################################
 
 # Standard
+import numpy as np
+import os
 import time
 
 # Project
-import binUtil
-import commands
-import config
 import messageUtil
+import sensor_conv
 import validator
+import ZAVDevice
 import zavController
 
 
@@ -29,12 +30,6 @@ import zavController
 # Global Variables                                                                 #
 ####################################################################################
 
-# Run config
-if ( config.zav_debug ):
-    default_timeout = 100 # 100 second timeout
-else:
-    default_timeout = 1   # 1 second timeout
-    
 # Subcommand and Options Dictionary
 INPUTS = {
         'dump' : {
@@ -80,6 +75,9 @@ POLL_COMMANDS = {
 # Timeout for sensor poll
 POLL_TIMEOUT = 100
 
+# Flash extract data location, data is saved per controller by flash extract
+EXTRACT_OUTPUT_DIR = "output/extract/"
+
 
 ####################################################################################
 # Procedures                                                                       #
@@ -89,51 +87,43 @@ POLL_TIMEOUT = 100
 ####################################################################################
 #                                                                                  #
 # PROCEDURE:                                                                       #
-#         sensor_extract_data_filter                                               #
+#         latest_extract_filename                                                  #
 #                                                                                  #
 # DESCRIPTION:                                                                     #
-#       Finds the end of valid data extracted from flash extract and return a list #
-#       containing only good data                                                  #
+#       Returns the most recent flash extract data file of a controller, or None   #
+#       if no data has been extracted. Files are saved as                          #
+#       output/extract/controller/MM-DD-YYYY/sensor_dataN.txt                      #
 #                                                                                  #
 ####################################################################################
-def sensor_extract_data_filter( data ):
-
-    # Indices of beginning and end of good data 
-    start_index = 0
-    end_index   = len( data ) - 1
-
-    # Search exit condition
-    exit = False
-
-    # Search index
-    search_index = 0
-    
-    # Begin binary search
-    while( not exit ):
-        # Set search index
-        search_index = ( (end_index - start_index)//2 ) + start_index
-
-        # Check if two consecutive rows are identically equal
-        rows_equal = ( data[search_index] == data[search_index+1] )
-
-        # Check for exit condition
-        if   (   search_index       == start_index ):
-            if ( rows_equal ):
-                return None
-            else:
-                return data[0:search_index-1]
-        elif ( ( search_index + 1 ) == end_index   ):
-            if ( rows_equal ):
-                return data[0:start_index-1]
-            else:
-                return data[0:end_index-1]
-        else: # No exit condfition
-            # Update search range
-            if ( rows_equal ):
-                end_index = search_index
-            else:
-                start_index = search_index
-## sensor_extract_data_filter ## 
+def latest_extract_filename( controller ):
+    base_data_dir = EXTRACT_OUTPUT_DIR + controller
+    if ( not os.path.isdir( base_data_dir ) ):
+        return None
+
+    # Extraction dates, most recent first
+    with os.scandir( base_data_dir ) as date_dirs:
+        date_dir_names = [ date_dir.name for date_dir in date_dirs 
+                           if ( date_dir.is_dir() and 
+                                len( date_dir.name ) == 10 ) ]
+    date_dir_names.sort( key = lambda date_dir: ( date_dir[6:]  , 
+                                                  date_dir[0:2] , 
+                                                  date_dir[3:5] ), 
+                         reverse = True )
+
+    # Most recent data of the most recent date that has any 
+    base_filename = "sensor_data"
+    for date_dir_name in date_dir_names:
+        data_dir = base_data_dir + "/" + date_dir_name
+        with os.scandir( data_dir ) as data_files:
+            data_nums = [ int( data_file.name[len( base_filename ):-4] ) 
+                          for data_file in data_files 
+                          if ( data_file.name.startswith( base_filename ) and 
+                               data_file.name.endswith( ".txt" )          and 
+                               data_file.name[len( base_filename ):-4].isdecimal() ) ]
+        if ( len( data_nums ) != 0 ):
+            return data_dir + "/" + base_filename + str( max( data_nums ) ) + ".txt"
+    return None
+## latest_extract_filename ##
 
 
 ####################################################################################
@@ -160,10 +150,6 @@ def sensor( Args, zavDevice, show_readouts = True ):
     # Size of sensor readouts
     readout_sizes = zavController.sensor_sizes[zavDevice.controller]
 
-    # Lists of sensor data
-    sensorByteData = []
-    sensorIntData  = []
-
 
     ################################################################################
     # Basic Inputs Parsing                                                         #
@@ -239,8 +225,7 @@ def sensor( Args, zavDevice, show_readouts = True ):
     elif ( subcommand == "dump" ):
 
         # Send sensor command/subcommand codes 
-        zavDevice.sendByte( OPCODE                       )
-        zavDevice.sendByte( SUBCOMMAND_CODES[subcommand] )
+        zavDevice.sendBytes( OPCODE + SUBCOMMAND_CODES[subcommand] )
 
         # Determine how many bytes are to be recieved
         sensor_dump_size = zavDevice.readByte()
@@ -248,9 +233,8 @@ def sensor( Args, zavDevice, show_readouts = True ):
                                      sensor_dump_size, 
                                      "big" )
 
-        # Recieve data from controller
-        for byteNum in range( sensor_dump_size ):
-            sensorByteData.append( zavDevice.readByte() )
+        # Recieve data from controller in one read
+        sensorByteData = zavDevice.readBytes( sensor_dump_size )
 
         # Get readouts from byte array
         sensor_readouts = zavDevice.getSensorReadouts( sensor_numbers, sensorByteData )
@@ -270,27 +254,31 @@ def sensor( Args, zavDevice, show_readouts = True ):
     ################################################################################
     elif ( subcommand == "poll" ):
 
-        # Send command/subcommand codes 
-        zavDevice.sendByte( OPCODE                       )
-        zavDevice.sendByte( SUBCOMMAND_CODES[subcommand] )
-
-        # Tell the controller how many sensors to use
-        zavDevice.sendByte( num_sensors.to_bytes( 1, 'big' ) )
-
-        # Send the controller the sensor codes
+        # Send command/subcommand codes, the number of sensors to use, the 
+        # sensor codes, and start the sensor poll sequence in one transmission
+        poll_codes = [ OPCODE, SUBCOMMAND_CODES[subcommand], 
+                       num_sensors.to_bytes( 1, 'big' ) ]
         for sensor_num in selectedSensorNames:
-            zavDevice.sendByte( sensor_poll_codes[sensor_num] )
-        
-        # Start the sensor poll sequence
-        zavDevice.sendByte( POLL_COMMANDS['START'] )
+            poll_codes.append( sensor_poll_codes[sensor_num] )
+        poll_codes.append( POLL_COMMANDS['START'] )
+        zavDevice.sendBytes( b''.join( poll_codes ) )
+
+        # The poll frame layout is fixed, build its decoder once
+        poll_decoder = ZAVDevice.sensor_decoder( zavDevice.controller, 
+                                                 selectedSensorNames )
 
         # Receive and display sensor readouts 
         timeout_ctr = 0
         while ( timeout_ctr <= POLL_TIMEOUT ):
             zavDevice.sendByte( POLL_COMMANDS['REQUEST'] )
-            sensorByteData  = zavDevice.readBytes( sensor_poll_frame_size ) 
-            sensorReadouts = zavDevice.getSensorReadouts( selectedSensorNames, 
-                                                          sensorByteData )
+            sensorByteData = zavDevice.readBytes( sensor_poll_frame_size ) or b''
+            if ( len( sensorByteData ) < sensor_poll_frame_size ):
+                print( "Error: No response received from the flight computer" )
+                break
+            sensorReadouts = zavDevice.convRawSensorReadouts( 
+                                ZAVDevice.decode_sensor_readouts( poll_decoder       , 
+                                                                  selectedSensorNames, 
+                                                                  sensorByteData ) )
 
             for sensor in sensorReadouts:
                 formattedReadout = zavDevice.formatSensorReadout( sensor, 
@@ -330,35 +318,31 @@ def sensor( Args, zavDevice, show_readouts = True ):
     ################################################################################
     elif ( subcommand == "plot" ):
 
-        # Data Filename 
-        filename = zavController.sensor_data_filenames[zavDevice.controller]
-
-        # Import Data
-        with open( filename, "r" ) as file:
-            sensor_data_lines = file.readlines()
-        sensor_data_str = []
-        for line in sensor_data_lines:
-            sensor_data_str.append( line.split('\t') )
-
-        # Convert to floating point format
-        sensor_data = []
-        for frame in sensor_data_str:
-            sensor_frame = []
-            for val in frame:
-                if ( val != '\n' ):
-                    sensor_frame.append( float( val ) )
-            sensor_data.append( sensor_frame )
+        # matplotlib is slow to import and only needed for plotting
+        from matplotlib import pyplot as plt
+
+        # Data Filename, the most recent flash extract
+        filename = latest_extract_filename( zavDevice.controller )
+        if ( filename is None ):
+            print( "Error: No flash extract data found for " + zavDevice.controller + 
+                   ". Run the \"flash extract\" subcommand to extract data." )
+            return
+
+        # Import Data, the time followed by each sensor readout. Only these 
+        # columns are parsed since each exported row ends with a tab
+        num_columns = 1 + len( zavController.sensor_sizes[zavDevice.controller] )
+        sensor_data = np.loadtxt( filename, delimiter = '\t', 
+                                  usecols = range( num_columns ), ndmin = 2 )
         
         # Filter out garbage flash data
-        sensor_data_filtered = sensor_extract_data_filter( sensor_data )
-        sensor_data_filtered = np.array( sensor_data_filtered )
+        sensor_data_filtered = sensor_conv.sensor_extract_data_filter( sensor_data )
 
         # Select data to plot
         sensor_labels = []
         for sensor in selectedSensorNames:
-            sensor_index = sensor_indices[zavDevice.controller][sensor]
+            sensor_index = zavController.sensor_indices[zavDevice.controller][sensor]
             sensor_label = ( sensor + " (" + 
-                             sensor_units[zavDevice.controller][sensor] + ")" )
+                             zavController.sensor_units[zavDevice.controller][sensor] + ")" )
             sensor_labels.append( sensor_label )
             time_data = sensor_data_filtered[:,0]/60.0 # minutes
             plt.plot( time_data, 
@@ -29,6 +29,12 @@ if ( 'debug' in cmd_args ):
 else:
     zav_debug = False
 
+# Serial port timeouts
+if ( zav_debug ):
+    DEFAULT_TIMEOUT = 100 # 100 second timeout
+else:
+    DEFAULT_TIMEOUT = 1   # 1 second timeout
+
 
 ###################################################################################
 # END OF FILE                                                                     # 
@@ -18,7 +18,6 @@
 import serial
 import serial.tools.list_ports
 import sys
-import time
 
 # Setup project directory structure
 sys.path.insert( 0, './commands')
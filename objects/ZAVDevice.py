@@ -15,13 +15,15 @@
 ####################################################################################
 
 # Standard
+import numpy as np
 import serial
 import serial.tools.list_ports
+import struct
+import time
 
 # Project
 import binUtil
 import zavController
-import sensor_conv
 
 
 ####################################################################################
@@ -32,6 +34,186 @@ import sensor_conv
 FLASH_WRITE_ENABLED  = True
 FLASH_WRITE_DISABLED = False
 
+# Time in seconds that a serial port listing is reused before enumerating 
+# the ports again
+PORTS_CACHE_TTL = 3.0
+
+# struct format codes of unsigned integer sensor readouts indexed by size in bytes
+INT_READOUT_FORMATS = {
+                      2: 'H',
+                      4: 'I',
+                      8: 'Q'
+                      }
+
+# Specialized sensor readout decoders, built on first use for each controller and
+# sensor selection
+SENSOR_DECODERS = {}
+
+
+####################################################################################
+# Procedures                                                                       #
+####################################################################################
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		sensor_frame_dtype                                                         #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		returns a NumPy structured dtype matching the layout of a controller's    #
+#       sensor frame in flash: a 4 byte time followed by each sensor readout.      #
+#       Float readouts are kept as raw 32 bit words so the erased flash value can  #
+#       be detected before they are reinterpreted                                  #
+#                                                                                  #
+####################################################################################
+def sensor_frame_dtype( controller ):
+    frame_fields = [ ( 'time', '<u4' ) ]
+    for sensor, size in zavController.sensor_sizes[controller].items():
+        frame_fields.append( ( sensor, '<u' + str( size ) ) )
+    return np.dtype( frame_fields )
+## sensor_frame_dtype ##
+
+
+# Sensor frame layouts for each controller 
+SENSOR_FRAME_DTYPES = { controller: sensor_frame_dtype( controller ) 
+                        for controller in zavController.sensor_sizes }
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		sensor_frame_format                                                        #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		returns the np.savetxt row format for a controller's converted sensor     #
+#       frames. Readouts that stay raw integers are written as integers and all    #
+#       other values as str() of the float, each followed by a tab                 #
+#                                                                                  #
+####################################################################################
+def sensor_frame_format( controller ):
+    conv_funcs   = zavController.sensor_conv_funcs[controller]
+    formats      = zavController.sensor_formats[controller]
+    frame_format = '%s\t'
+    for sensor in zavController.sensor_sizes[controller]:
+        if ( ( formats[sensor] == int ) and ( conv_funcs[sensor] == None ) ):
+            frame_format += '%d\t'
+        else:
+            frame_format += '%s\t'
+    return frame_format
+## sensor_frame_format ##
+
+
+# Sensor frame export formats for each controller
+SENSOR_FRAME_FORMATS = { controller: sensor_frame_format( controller ) 
+                         for controller in zavController.sensor_sizes }
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		sensor_decode_plan                                                         #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		returns the readout size in bytes and whether the readout is a float for   #
+#       each of a controller's sensors                                             #
+#                                                                                  #
+####################################################################################
+def sensor_decode_plan( controller ):
+    sensor_formats = zavController.sensor_formats[controller]
+    return { sensor: ( size, sensor_formats[sensor] == float ) 
+             for sensor, size in zavController.sensor_sizes[controller].items() }
+## sensor_decode_plan ##
+
+
+# Sensor readout decoding for each controller
+SENSOR_DECODE_PLANS = { controller: sensor_decode_plan( controller ) 
+                        for controller in zavController.sensor_sizes }
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		sensor_decoder                                                             #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		returns a precompiled struct that unpacks the readouts of the selected     #
+#       sensors in one call, and the (position, byte offset) of each float         #
+#       readout. Decoders are cached by controller and sensor selection            #
+#                                                                                  #
+####################################################################################
+def sensor_decoder( controller, sensors ):
+    decoder_key = ( controller, tuple( sensors ) )
+    decoder     = SENSOR_DECODERS.get( decoder_key )
+    if ( decoder is None ):
+        decode_plan   = SENSOR_DECODE_PLANS[controller]
+        readout_fmt   = [ '<' ]
+        float_fields  = []
+        offset        = 0
+        for position, sensor in enumerate( sensors ):
+            size, is_float = decode_plan[sensor]
+            if ( is_float ):
+                readout_fmt.append( 'f' )
+                float_fields.append( ( position, offset ) )
+            else:
+                readout_fmt.append( INT_READOUT_FORMATS[size] )
+            offset += size
+        decoder = ( struct.Struct( ''.join( readout_fmt ) ), tuple( float_fields ) )
+        SENSOR_DECODERS[decoder_key] = decoder
+    return decoder
+## sensor_decoder ##
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		decode_sensor_readouts                                                     #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		unpacks the readouts of the selected sensors from a received buffer using  #
+#       a decoder from sensor_decoder, returns a dictionary of raw readouts        #
+#                                                                                  #
+####################################################################################
+def decode_sensor_readouts( decoder, sensors, sensor_bytes ):
+    readout_struct, float_fields = decoder
+    sensor_vals = list( readout_struct.unpack_from( sensor_bytes ) )
+
+    # Erased/unset float readouts (0xFFFFFFFF) unpack as NaN and are 
+    # reported as 0.0
+    for position, offset in float_fields:
+        if ( sensor_vals[position] != sensor_vals[position] ):
+            sensor_vals[position] = binUtil.float_at( sensor_bytes, offset )
+
+    return dict( zip( sensors, sensor_vals ) )
+## decode_sensor_readouts ##
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		sensor_readout_formats                                                     #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		returns the display format string of each of a controller's sensors: the   #
+#       label, the readout rounded to 3 decimals, and the units                    #
+#                                                                                  #
+####################################################################################
+def sensor_readout_formats( controller ):
+    readout_formats = {}
+    for sensor, units in zavController.sensor_units[controller].items():
+        if ( units != None ):
+            readout_format = sensor + ": {:.3f} " + units
+        else:
+            readout_format = sensor + ": {}"
+        readout_formats[sensor] = readout_format
+    return readout_formats
+## sensor_readout_formats ##
+
+
+# Sensor readout display formats for each controller
+SENSOR_READOUT_FORMATS = { controller: sensor_readout_formats( controller ) 
+                           for controller in zavController.sensor_units }
+
 
 ####################################################################################
 # Objects                                                                          #
@@ -64,6 +246,9 @@ class ZAVDevice:
         self.firmware            = None
         self.flash_write_enabled = False 
         self.sensor_readouts     = {}
+        self.ping_buffer         = bytearray( 1 )
+        self.ports_cache         = None
+        self.ports_cache_time    = 0.0
 
     # Initialize Serial Port
     def initComport(self, baudrate, comport, timeout):
@@ -75,11 +260,16 @@ class ZAVDevice:
         self.serialObj.timeout   = self.timeout
         self.config_status       = True
 
-    # Configure Serial port from class attributes
+    # Configure Serial port from class attributes. Only changed settings are 
+    # applied, pyserial reconfigures an open port on every assignment and 
+    # reopens it when the port is assigned
     def configComport(self):
-        self.serialObj.baudrate = self.baudrate
-        self.serialObj.port     = self.comport
-        self.serialObj.timeout  = self.timeout
+        if ( self.serialObj.baudrate != self.baudrate ):
+            self.serialObj.baudrate = self.baudrate
+        if ( self.serialObj.port     != self.comport  ):
+            self.serialObj.port     = self.comport
+        if ( self.serialObj.timeout  != self.timeout  ):
+            self.serialObj.timeout  = self.timeout
 
 	# Set the controller to enable board-specific commands
     def set_controller(self, controller_name, firmware_name = None ):
@@ -113,6 +303,7 @@ class ZAVDevice:
 
         # open port
         self.serialObj.open()
+        self.ports_cache = None
         return True
 
     # Close the serial port
@@ -125,6 +316,7 @@ class ZAVDevice:
             return False
         else:
             self.serialObj.close()
+            self.ports_cache = None
             return True
 
 	# Check if serial port is active
@@ -138,6 +330,17 @@ class ZAVDevice:
 	    for port in available_ports:
 		    available_port_names.append(port.device)
 	    return available_port_names
+
+    # List available serial ports, reusing the previous listing if it was 
+    # taken within PORTS_CACHE_TTL seconds and no port has been opened or 
+    # closed since
+    def list_ports_cached(self):
+        current_time = time.monotonic()
+        if ( ( self.ports_cache is None ) or 
+             ( current_time - self.ports_cache_time > PORTS_CACHE_TTL ) ):
+            self.ports_cache      = list( serial.tools.list_ports.comports() )
+            self.ports_cache_time = current_time
+        return self.ports_cache
     
 
     ################################################################################
@@ -146,11 +349,7 @@ class ZAVDevice:
 
     # Write a single Byte to the serial port
     def sendByte(self, byte):
-        if (not self.serialObj.is_open):
-            print("Error: Could not transmit byte over serial port. No active" \
-                   +"serial port connection")
-        else:
-            self.serialObj.write(byte)
+        self.sendBytes( byte )
 
     # Write an array of bytes to the serial port 
     def sendBytes(self, byte_array):
@@ -162,22 +361,64 @@ class ZAVDevice:
 
     # Read a single Byte from the serial port
     def readByte(self):
+        return self.readBytes( 1 )
+
+    # Read multiple bytes from the serial port
+    def readBytes( self, num_bytes ):
         if (not self.serialObj.is_open):
             print("Error: Could not read byte from serial port. No active" \
                    +"serial port connection")
         else:
-             return self.serialObj.read()
-
-    # Read multiple bytes from the serial port
-    def readBytes( self, num_bytes ):
+            # Keep reading until all bytes arrive or a read times out
+            rx_bytes = bytearray()
+            while ( len( rx_bytes ) < num_bytes ):
+                rx_chunk = self.serialObj.read( num_bytes - len( rx_bytes ) )
+                if ( not rx_chunk ):
+                    break
+                rx_bytes += rx_chunk
+            return bytes( rx_bytes )
+
+    # Read bytes from the serial port into a preallocated buffer, returns the 
+    # number of bytes read
+    def readInto( self, buffer ):
         if (not self.serialObj.is_open):
             print("Error: Could not read byte from serial port. No active" \
                    +"serial port connection")
+            return 0
         else:
-            rx_bytes = []
-            for i in range( num_bytes ):
-                rx_bytes.append( self.serialObj.read() )
-            return rx_bytes 
+            # Keep reading until the buffer is full or a read times out
+            buffer_view    = memoryview( buffer )
+            num_bytes_read = 0
+            while ( num_bytes_read < len( buffer_view ) ):
+                num_rx = self.serialObj.readinto( buffer_view[num_bytes_read:] )
+                if ( not num_rx ):
+                    break
+                num_bytes_read += num_rx
+            return num_bytes_read
+
+    # Fill a preallocated buffer from the serial port, no further reads are 
+    # started once timeout seconds have passed. The port settings are not 
+    # changed, set the port timeout with configComport beforehand so that each 
+    # read is also bounded. Returns the number of bytes read
+    def readExactly( self, buffer, timeout ):
+        if (not self.serialObj.is_open):
+            print("Error: Could not read byte from serial port. No active" \
+                   +"serial port connection")
+            return 0
+
+        # Read until the buffer is full or the deadline passes, returning as 
+        # soon as the last byte arrives 
+        buffer_view    = memoryview( buffer )
+        num_bytes_read = 0
+        deadline       = time.monotonic() + timeout
+        while ( num_bytes_read < len( buffer_view ) ):
+            if ( time.monotonic() >= deadline ):
+                break
+            num_rx = self.serialObj.readinto( buffer_view[num_bytes_read:] )
+            if ( not num_rx ):
+                break
+            num_bytes_read += num_rx
+        return num_bytes_read
 
     # Flush the input serial buffer
     def flushComport( self ):
@@ -192,27 +433,9 @@ class ZAVDevice:
     # readouts in integer format                                                 
     def getRawSensorReadouts( self, sensors, sensor_bytes ):
 
-        # Sensor readout sizes
-        sensor_size_dict = zavController.sensor_sizes[self.controller]
-
-        # Starting index of bytes corresponding to individual 
-        # sensor readout in sensor_bytes array
-        index = 0
-
-        # Result
-        readouts = {}
-        
-        # Convert each sensor readout 
-        for sensor in sensors:
-            size             = sensor_size_dict[sensor]
-            readout_bytes    = sensor_bytes[index:index+size]
-            if ( zavController.sensor_formats[self.controller][sensor] == float ):
-                sensor_val = binUtil.byte_array_to_float( readout_bytes )
-            else:
-                sensor_val = binUtil.byte_array_to_int(   readout_bytes )
-            readouts[sensor] = sensor_val
-            index           += size 
-
+        # Unpack every readout in one call, in place from the received buffer
+        decoder  = sensor_decoder( self.controller, sensors )
+        readouts = decode_sensor_readouts( decoder, sensors, sensor_bytes )
         return readouts
     ## getRawSensorReadouts ##
 
@@ -251,22 +474,7 @@ class ZAVDevice:
 
     # Formats a sensor readout into a label, rounded readout, and units 
     def formatSensorReadout( self, sensor, readout ):
-
-        # Readout units
-        units = zavController.sensor_units[self.controller][sensor] 
-
-        # Rounded readout
-        if ( units != None ):
-            readout_str = "{:.3f}".format( readout )
-        else:
-            readout_str = str( readout )
-
-        # Concatentate label, readout, and units
-        if ( units != None ):
-            output = sensor + ": " + readout_str + " " + units
-        else:
-            output = sensor + ": " + readout_str
-        return output
+        return SENSOR_READOUT_FORMATS[self.controller][sensor].format( readout )
     ## formatSensorReadout ##
 
 
@@ -282,54 +490,55 @@ class ZAVDevice:
     ## getSensorFrameBytes ##
     
 
-    # Converts a list of sensor frames into measurements
+    # Converts a list of sensor frames into measurements, returns an array with 
+    # one row per frame: the time in seconds followed by each sensor readout
     def getSensorFrames( self, sensor_frames_bytes, format = 'converted' ):
 
-        # Convert to integer format
-        sensor_frames_int = []
-        for frame in sensor_frames_bytes:
-            sensor_frame_int = []
-            for sensor_byte in frame:
-                sensor_frame_int.append( ord( sensor_byte ) )
-            sensor_frames_int.append( sensor_frame_int )
-
-        # Combine bytes from integer data and convert
-        if ( format == 'converted'):
-            sensor_frames = []
-            for int_frame in sensor_frames_int:
-                sensor_frame = []
-                # Time of frame measurement
-                time = ( ( int_frame[0]       ) + 
-                        ( int_frame[1] << 8  ) + 
-                        ( int_frame[2] << 16 ) +
-                        ( int_frame[3] << 24 ) )
-                # Conversion to seconds
-                sensor_frame.append( sensor_conv.time_millis_to_sec( time ) )
-
-                # Sensor readouts
-                sensor_frame_dict = {}
-                index = 4
-                for i, sensor in enumerate( zavController.sensor_sizes[ self.controller ] ):
-                    measurement = 0
-                    float_bytes = []
-                    for byte_num in range( zavController.sensor_sizes[self.controller][sensor] ):
-                        if ( zavController.sensor_formats[self.controller][sensor] != float ):
-                            measurement += ( int_frame[index + byte_num] << 8*byte_num )
-                        else:
-                            float_bytes.append( ( int_frame[index + byte_num] ).to_bytes(1, 'big' ) ) 
-                    if ( zavController.sensor_formats[self.controller][sensor] == float ):
-                        measurement = binUtil.byte_array_to_float( float_bytes )
-                    sensor_frame_dict[sensor] = measurement
-                    index += zavController.sensor_sizes[self.controller][sensor]
-                sensor_vals_list = list( self.convRawSensorReadouts( sensor_frame_dict ).values() )
-                for val in sensor_vals_list:
-                    sensor_frame.append( val )
-                sensor_frames.append( sensor_frame )
+        # Decode all frames at once from one contiguous buffer, trailing 
+        # partial frames are dropped
+        if ( isinstance( sensor_frames_bytes, ( bytes, bytearray, memoryview ) ) ):
+            frames_buffer = sensor_frames_bytes
+        else:
+            frames_buffer = b''.join( sensor_frames_bytes )
+        frame_dtype = SENSOR_FRAME_DTYPES[self.controller]
+        num_frames  = len( frames_buffer )//frame_dtype.itemsize
+
+        # Raw bytes of each frame
+        if ( format == 'bytes' ):
+            frames_int = np.frombuffer( frames_buffer, dtype = np.uint8, 
+                                        count = num_frames*frame_dtype.itemsize )
+            return frames_int.reshape( num_frames, frame_dtype.itemsize ).tolist()
+
+        # Combine bytes from integer data and convert, one column per sensor
+        elif ( format == 'converted' ):
+            frames        = np.frombuffer( frames_buffer, dtype = frame_dtype, 
+                                           count = num_frames )
+            sensor_frames = np.empty( ( num_frames, len( frame_dtype.names ) ) )
+
+            # Time of frame measurement, conversion to seconds
+            sensor_frames[:, 0] = frames['time']/1000.0
+
+            # Sensor readouts
+            conv_funcs = zavController.sensor_conv_funcs[self.controller]
+            formats    = zavController.sensor_formats[self.controller]
+            for column, sensor in enumerate( frame_dtype.names[1:], start = 1 ):
+                readouts = frames[sensor]
+                if ( formats[sensor] == float ):
+                    # Erased flash (0xFFFFFFFF) reads as 0.0
+                    readouts = np.where( readouts == 0xFFFFFFFF, 0.0, 
+                                         readouts.view( '<f4' ).astype( np.float64 ) )
+                else:
+                    readouts = readouts.astype( np.int64 )
+                if ( conv_funcs[sensor] != None ):
+                    readouts = conv_funcs[sensor]( readouts )
+                sensor_frames[:, column] = readouts
             return sensor_frames
-        elif ( format == 'bytes' ):
-            return sensor_frames_int 
     ## getSensorFrame ##
 
+    # Row format used to export converted sensor frames to text
+    def getSensorFrameFormat( self ):
+        return SENSOR_FRAME_FORMATS[self.controller]
+
     ################################################################################
     # Misc                                                                         #
     ################################################################################
@@ -15,6 +15,24 @@
 import struct
 
 
+####################################################################################
+# Globals                                                                          #
+####################################################################################
+
+# Precompiled binary formats, least significant bytes first
+FLOAT_STRUCT = struct.Struct( '<f' )
+U16_STRUCT   = struct.Struct( '<H' )
+U32_STRUCT   = struct.Struct( '<I' )
+U64_STRUCT   = struct.Struct( '<Q' )
+
+# Fixed width integer formats indexed by size in bytes, used by byte_array_to_int
+INT_STRUCTS = {
+              2: U16_STRUCT,
+              4: U32_STRUCT,
+              8: U64_STRUCT
+              }
+
+
 ####################################################################################
 # Procedures                                                                       #
 ####################################################################################
@@ -26,14 +44,12 @@ import struct
 #         get_bit                                                                  #
 #                                                                                  #
 # DESCRIPTION:                                                                     #
-#         extracts a specific bit from an integer                                  #
+#         extracts a specific bit from an integer.                                 #
+#         Not used within the tree, kept for external callers                      #
 #                                                                                  #
 ####################################################################################
 def get_bit( num, bit_index ):
-    if ( num & ( 1 << bit_index ) ):
-        return 1
-    else:    
-        return 0
+    return ( num >> bit_index ) & 1
 ## get_bit ##
 
 
@@ -44,18 +60,23 @@ def get_bit( num, bit_index ):
 #                                                                                  #
 # DESCRIPTION:                                                                     #
 #         Returns an integer corresponding the hex number passed into the function #
-#       as a byte array. Assumes least significant bytes are first                 #
+#       as a byte array. Assumes least significant bytes are first. Accepts a      #
+#       bytes-like buffer or a list of single bytes. Not used within the tree,     #
+#       kept for external callers                                                  #
 #                                                                                  #
 ####################################################################################
 def byte_array_to_int( byte_array ):
-    int_val   = 0 # Intermediate computation value
-    result    = 0 # Final result integer
-    num_bytes = len( byte_array )
-    for i, byte in enumerate( byte_array ):
-        int_val = int.from_bytes( byte, 'big')
-        int_val = int_val << 8*i
-        result += int_val
-    return result
+    if ( not isinstance( byte_array, ( bytes, bytearray, memoryview ) ) ):
+        byte_array = b''.join( byte_array )
+
+    # Fast path for the common sensor readout widths
+    int_struct = INT_STRUCTS.get( len( byte_array ) )
+    if ( int_struct is not None ):
+        return int_struct.unpack( byte_array )[0]
+
+    # Byte i is weighted by 2^(8*i), i.e. little endian. Equivalent to the old
+    # loop: sum( byte << 8*i for i, byte in enumerate( byte_array ) )
+    return int.from_bytes( byte_array, 'little' )
 ## byte_array_to_int ##
 
 
@@ -67,18 +88,39 @@ def byte_array_to_int( byte_array ):
 # DESCRIPTION:                                                                     #
 #         Returns an floating point number corresponding the hex number passed     #
 #         into the function as a byte array. Assumes least significant bytes are   #
-#         first                                                                    #
+#         first. Accepts a bytes-like buffer or a list of single bytes. Thin       #
+#         wrapper around float_at, kept for external callers                       #
 #                                                                                  #
 ####################################################################################
 def byte_array_to_float( byte_array ):
-    # Check to NaN
-    if ( byte_array == [b'\xFF', b'\xFF', b'\xFF', b'\xFF'] ):
-        byte_array = [b'\x00', b'\x00', b'\x00', b'\x00']
-    byte_array_joined = b''.join( byte_array )
-    return struct.unpack( 'f', byte_array_joined )[0]
+    if ( isinstance( byte_array, ( bytes, bytearray, memoryview ) ) ):
+        byte_array_joined = byte_array
+    else:
+        byte_array_joined = b''.join( byte_array )
+
+    return float_at( byte_array_joined )
 ## byte_array_to_float ##
 
 
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+#         float_at                                                                 #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+#         Returns the floating point number stored in the 4 bytes of a buffer      #
+#         starting at offset, without copying. Assumes least significant bytes     #
+#         are first                                                                #
+#                                                                                  #
+####################################################################################
+def float_at( byte_buffer, offset = 0 ):
+    # Check to NaN
+    if ( byte_buffer[offset:offset+4] == b'\xFF\xFF\xFF\xFF' ):
+        return 0.0
+    return FLOAT_STRUCT.unpack_from( byte_buffer, offset )[0]
+## float_at ##
+
+
 ###################################################################################
 # END OF FILE                                                                     #
 ###################################################################################
\ No newline at end of file
@@ -9,11 +9,35 @@
 ####################################################################################
 
 
+####################################################################################
+# Imports                                                                          #
+####################################################################################
+import functools
+import os
+import sys
+
+
 ####################################################################################
 # Procedures                                                                       #
 ####################################################################################
 
 
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		load_doc                                                                   #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		reads a command's doc file, cached so each file is only read once          #
+#                                                                                  #
+####################################################################################
+@functools.lru_cache( maxsize = 32 )
+def load_doc( command ):
+	with open( os.path.join( "doc", command ), "r", encoding = "utf-8" ) as file:
+		return file.read()
+## load_doc ##
+
+
 ####################################################################################
 #                                                                                  #
 # PROCEDURE:                                                                       #
@@ -24,12 +48,7 @@
 #                                                                                  #
 ####################################################################################
 def display_help_info( command ):
-	with open ("doc/" + command ) as file:
-		doc_lines = file.readlines()
-	print()
-	for line in doc_lines:
-		print( line, end='' )
-	print()
+	sys.stdout.write( "\n" + load_doc( command ) + "\n" )
 ## display_help_info ##
 
 
@@ -43,8 +62,8 @@ def display_help_info( command ):
 #                                                                                  #
 ####################################################################################
 def error_msg():
-	print( "Something went wrong. Report this issue to " + 
-              "the Zenith development team" )	
+	print( "Something went wrong. Report this issue to "
+           "the Zenith development team" )	
 ## error_msg ##
 
 
@@ -15,9 +15,7 @@
 
 # Standard imports 
 import math
-
-# Project imports
-from config import *
+import numpy as np
 
 
 ####################################################################################
@@ -189,12 +187,9 @@ def tc_temp( readout ):
 ####################################################################################
 def imu_accel( readout ):
 	
-	# Convert from 16 bit unsigned to 16 bit sRigned
-	signed_int = 0
-	if ( readout < 2**(15) ):
-		signed_int = readout	
-	else:
-		signed_int = -( ( ~(readout) + 1 ) & 0xFFFF )
+	# Convert from 16 bit unsigned to 16 bit signed, branchless so that 
+	# readouts can also be a NumPy array of int64 
+	signed_int = readout - ( ( readout & 0x8000 ) << 1 )
 
 	# Convert to acceleration	
 	num_bits   = 16
@@ -220,12 +215,9 @@ def imu_accel( readout ):
 ####################################################################################
 def imu_gyro( readout ):
 	
-	# Convert from 16 bit unsigned to 16 bit signed
-	signed_int = 0
-	if ( readout < 2**(15) ):
-		signed_int = readout	
-	else:
-		signed_int = -( ( ~(readout) + 1 ) & 0xFFFF ) 
+	# Convert from 16 bit unsigned to 16 bit signed, branchless so that 
+	# readouts can also be a NumPy array of int64 
+	signed_int = readout - ( ( readout & 0x8000 ) << 1 )
 
 	# Convert to acceleration	
 	num_bits         = 16
@@ -233,7 +225,7 @@ def imu_gyro( readout ):
 	gyro_sensitivity = float(2**(num_bits) -1 )/(2*gyro_setting)  # LSB/(deg/s)
 	
 	# Final conversion
-	return float(signed_int)/( gyro_sensitivity ) 
+	return signed_int/( gyro_sensitivity ) 
 
 ## imu_gryo ##
 
@@ -323,7 +315,7 @@ def encoder_int_to_deg( encoder_out ):
 #                                                                                  #
 # DESCRIPTION:                                                                     #
 #     Converts pressure readouts in kPa to altitude using the ground pressure and  #
-#     altitude pressure                                                            #
+#     altitude pressure. pressure may be a scalar or a NumPy array of readouts     #
 #                                                                                  #
 ####################################################################################
 def pressure_to_alt( pressure, ground_pressure ):
@@ -382,6 +374,31 @@ def fuel_pressure_to_flow( dp ):
 ## fuel_pressure_to_flow ##
 
 
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 	   sensor_extract_data_filter                                                  #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+#     Finds the end of valid data extracted from flash and returns an array        #
+#     containing only good data. Erased flash repeats the same frame, so the data  #
+#     is cut before the first row identical to its successor. All rows are         #
+#     returned if no row repeats, and none if every row is identical               #
+#                                                                                  #
+####################################################################################
+def sensor_extract_data_filter( data ):
+	# Erased flash repeats the same frame, valid data ends before the first 
+	# row that is identical to its successor
+	data       = np.asarray( data, dtype = np.float64 )
+	if ( len( data ) < 2 ):
+		return data
+	rows_equal = np.flatnonzero( np.all( data[1:] == data[:-1], axis = 1 ) )
+	if ( len( rows_equal ) == 0 ):
+		return data
+	return data[0:rows_equal[0]]
+## sensor_extract_data_filter ##
+
+
 ####################################################################################
 # END OF FILE                                                                      # 
 ####################################################################################
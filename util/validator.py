@@ -12,6 +12,8 @@
 ####################################################################################
 # Imports                                                                          #
 ####################################################################################
+import functools
+import sys
 
 
 ####################################################################################
@@ -40,6 +42,10 @@ commandCallbacks = [
 TERMINAL_PROMPT              = "ZCC> "
 UNRECOGNIZED_COMMAND_MESSAGE = "Error: Unsupported command"
 
+# Formatted lists of valid subcommands/options, indexed by the id of the 
+# inputs dictionary
+help_str_cache = {}
+
 
 ####################################################################################
 # Procedures                                                                       #
@@ -49,116 +55,189 @@ UNRECOGNIZED_COMMAND_MESSAGE = "Error: Unsupported command"
 ####################################################################################
 #                                                                                  #
 # PROCEDURE:                                                                       #
-# 		parseArgs                                                                  #
+# 		options_help_str                                                           #
 #                                                                                  #
 # DESCRIPTION:                                                                     #
-# 		runs basic checks on command inputs and outputs a                          #
-#       boolean indicating if the user input passes the                            #
-#       checks                                                                     #
+# 		returns the list of valid subcommands or options in an inputs             #
+#       dictionary formatted for display. The result is cached per dictionary      #
 #                                                                                  #
 ####################################################################################
-def parseArgs(
+def options_help_str( Args_dic ):
+	cached_help = help_str_cache.get( id( Args_dic ) )
+	if ( cached_help is None ):
+		help_lines = []
+		for option, description in Args_dic.items():
+			if ( isinstance( description, dict ) ): # subcommand
+				help_lines.append( '\t' + option + '\n' )
+			else:
+				help_lines.append( '\t' + option + '\t' + description + '\n' )
+
+		# Keep a reference to the dictionary so its id is never reused
+		cached_help = ( Args_dic, ''.join( help_lines ) + '\n' )
+		help_str_cache[id( Args_dic )] = cached_help
+	return cached_help[1]
+## options_help_str ##
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		parseSubcommandArgs                                                        #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		runs the basic input checks for commands with subcommands                  #
+#                                                                                  #
+####################################################################################
+def parseSubcommandArgs(
              Args,          # function arguments
 			 max_num_Args,  # maximum number of function arguments
-             Args_dic,      # dictionary of supported inputs
-             command_type,  # indicates if command has subcommands
+             Args_dic,      # dictionary of supported subcommands and options
              ):
 
-	##############################################################################
-	# Local Variables                                                            #
-	##############################################################################
+	# No Subcommand
+	if ( len(Args) == 0 ): 
+		print( 'Error: No subcommand supplied. Valid ' +
+               'subcommands include: ' )
+		sys.stdout.write( options_help_str( Args_dic ) )
+		return FAIL
+	subcommand = Args[0]
 
+	# Too Many Inputs
+	if ( len(Args) > max_num_Args ): 
+		print( 'Error: To many inputs.' )
+		return FAIL
 
-	# subcommand support
-	if ( command_type == 'subcommand' ):
-		subcommand_func = True
-	else:
-		subcommand_func = False
+	# Unrecognized Subcommand
+	subcommand_options = Args_dic.get( subcommand )
+	if ( subcommand_options is None ): 
+		print('Error: Unrecognized subcommand. Valid ' +
+              'subcommands include: ')
+		sys.stdout.write( options_help_str( Args_dic ) )
+		return FAIL
 
+	# Subcommand valid, exit if subcommand has no options
+	if ( len( subcommand_options ) == 0 ):
+		return PASS
 
-	##############################################################################
-	# Input Tests                                                                #
-	##############################################################################
+	# No option supplied after subcommand
+	if ( len(Args) == 1 ):
+		print( 'Error: No options supplied. Valid ' +
+               'options include: ' )
+		sys.stdout.write( options_help_str( subcommand_options ) )
+		return FAIL
 
-	# No Subcommands/Options
-	if ( subcommand_func ):
-		if ( len(Args) == 0 ): # no subcommand
-			print( 'Error: No subcommand supplied. Valid ' +
-                   'subcommands include: ' )
-			for subcommand in Args_dic:
-				print( '\t' + subcommand )
-			print()
-			return FAIL
-		subcommand = Args[0]
-	else:
-		if ( len(Args) == 0 ): # no options
-			print( 'Error: No options supplied. Valid ' +
-                   'options include: ' )
-			for option in Args_dic:
-				print( '\t' + option + '\t' + Args_dic[option] ) 
-			print()
+	# Unrecognized Option	
+	for user_option in Args[1:]:
+		if ( user_option.startswith( '-' ) and 
+		     not (user_option in subcommand_options) ): 
+			print( 'Error: Unrecognized option. Valid ' +
+                   'options include: ')
+			sys.stdout.write( options_help_str( subcommand_options ) )
 			return FAIL
-		user_option = Args[0]
+
+	# User input passes all checks	
+	return PASS
+## parseSubcommandArgs ##
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		parseOptionArgs                                                            #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		runs the basic input checks for commands with options only                 #
+#                                                                                  #
+####################################################################################
+def parseOptionArgs(
+             Args,          # function arguments
+			 max_num_Args,  # maximum number of function arguments
+             Args_dic,      # dictionary of supported options
+             ):
+
+	# No Options
+	if ( len(Args) == 0 ): 
+		print( 'Error: No options supplied. Valid ' +
+               'options include: ' )
+		sys.stdout.write( options_help_str( Args_dic ) )
+		return FAIL
+	user_option = Args[0]
 
 	# Too Many Inputs
 	if ( len(Args) > max_num_Args ): 
 		print( 'Error: To many inputs.' )
 		return FAIL
 
-	# Unrecognized Subcommand
-	if ( subcommand_func ):
-		if ( not (subcommand in Args_dic) ): 
-			print('Error: Unrecognized subcommand. Valid ' +
-                  'subcommands include: ')
-			for subcommand in Args_dic:
-				print( '\t' + subcommand )
-			print()
-			return FAIL
-		num_options = len( Args_dic[subcommand] )
-		# No option supplied after subcommand
-		if ( (len(Args) == 1) and (num_options != 0) ):
-			print( 'Error: No options supplied. Valid ' +
-                   'options include: ' )
-			for option in Args_dic[subcommand]:
-				print( '\t' + option + '\t' + 
-                       Args_dic[subcommand][option] ) 
-			print()
-			return FAIL
-		# Subcommand valid, exit if subcommand has no options
-		if ( num_options == 0 ):
-			return PASS
-		else: 
-			# Organize user options into a list
-			user_options = []
-			for arg in Args[1:]:
-				if ( '-' in arg ):
-					user_options.append(arg)
-
 	# Unrecognized Option	
-	if ( subcommand_func ): #subcommand supported
-		for user_option in user_options:	
-			if ( not(user_option in Args_dic[subcommand]) ): 
-				print( 'Error: Unrecognized option. Valid ' +
-                       'options include: ')
-				for option in Args_dic[subcommand]:
-					print( '\t' + option + '\t' + 
-                           Args_dic[subcommand][option] ) 
-				print()
-				return FAIL
-	else: # subcommand not supported 
-		if ( not(user_option in Args_dic) ): 
-			print( 'Error: Unrecognized option. Valid ' +
-                   'options include: ' )
-			for option in Args_dic:
-				print( '\t' + option + '\t' + Args_dic[option] ) 
-			print()
-			return FAIL
+	if ( not(user_option in Args_dic) ): 
+		print( 'Error: Unrecognized option. Valid ' +
+               'options include: ' )
+		sys.stdout.write( options_help_str( Args_dic ) )
+		return FAIL
 
 	# User input passes all checks	
 	return PASS
+## parseOptionArgs ##
+
+
+# Input checks for each command type, commands without subcommands use the 
+# default checks
+PARSE_FUNCS = {
+              'subcommand': parseSubcommandArgs,
+              'default'   : parseOptionArgs
+}
+
+
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		parseArgs                                                                  #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		runs basic checks on command inputs and outputs a                          #
+#       boolean indicating if the user input passes the                            #
+#       checks                                                                     #
+#                                                                                  #
+####################################################################################
+def parseArgs(
+             Args,          # function arguments
+			 max_num_Args,  # maximum number of function arguments
+             Args_dic,      # dictionary of supported inputs
+             command_type,  # indicates if command has subcommands
+             ):
+	parse_func = PARSE_FUNCS.get( command_type, parseOptionArgs )
+	return parse_func( Args, max_num_Args, Args_dic )
 ## parseArgs ##
 
 
+####################################################################################
+#                                                                                  #
+# PROCEDURE:                                                                       #
+# 		validated                                                                  #
+#                                                                                  #
+# DESCRIPTION:                                                                     #
+# 		decorator that runs the parseArgs checks before a command and skips the    #
+#       command if the user input fails them                                       #
+#                                                                                  #
+####################################################################################
+def validated(
+             max_num_Args,  # maximum number of function arguments
+             Args_dic,      # dictionary of supported inputs
+             command_type,  # indicates if command has subcommands
+             ):
+	parse_func = PARSE_FUNCS.get( command_type, parseOptionArgs )
+
+	def validated_decorator( command ):
+		@functools.wraps( command )
+		def validated_command( Args, zavDevice ):
+			if ( not parse_func( Args, max_num_Args, Args_dic ) ):
+				return # user inputs failed parse tests
+			return command( Args, zavDevice )
+		return validated_command
+	return validated_decorator
+## validated ##
+
+
 ####################################################################################
 #                                                                                  #
 # PROCEDURE:                                                                       #
@@ -20,14 +20,6 @@ import sensor_conv
 ####################################################################################
 
 
-# Controller identification codes
-controller_codes = [ 
-                  b'\x01', # Base Flight Computer,            Rev 1.0
-                  b'\x02', # Full Flight Computer ,           Rev 1.0 
-                  b'\x03', # Legacy SDR Flight Computer,      Rev 1.0 
-                  b'\x04'  # Legacy SDR Flight Computer Lite, Rev 1.0
-                   ]
-
 # Controller Names
 controller_names = [
                     "Base Flight Computer (A0001 Rev 1.0)"        ,
@@ -36,12 +28,13 @@ controller_names = [
                     "Legacy SDR Flight Computer Lite (A0004 Rev 1.0)"
                    ]
 
-# Controller descriptions from identification codes
+# Controller descriptions from identification code byte values, unknown codes 
+# have no entry
 controller_descriptions = {
-                    b'\x01': "Base Flight Computer (A0001 Rev 1.0)"        ,
-                    b'\x02': "Full Feature Flight Computer (A0002 Rev 1.0)",
-                    b'\x03': "Legacy SDR Flight Computer (A0003 Rev 1.0)"  ,
-                    b'\x04': "Legacy SDR Flight Computer Lite (A0004 Rev 1.0)"
+                    0x01: "Base Flight Computer (A0001 Rev 1.0)"        ,
+                    0x02: "Full Feature Flight Computer (A0002 Rev 1.0)",
+                    0x03: "Legacy SDR Flight Computer (A0003 Rev 1.0)"  ,
+                    0x04: "Legacy SDR Flight Computer Lite (A0004 Rev 1.0)"
                         }
 
 # Lists of sensors on each controller
@@ -403,9 +396,9 @@ sensor_formats = {
 
 # Firmware Ids
 firmware_ids = {
-                b'\x01': "Terminal"   ,
-				b'\x02': "Data Logger",
-				b'\x03': "Dual Deploy"
+                0x01: "Terminal"   ,
+				0x02: "Data Logger",
+				0x03: "Dual Deploy"
                }
 			
 